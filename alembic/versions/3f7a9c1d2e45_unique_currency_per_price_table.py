@@ -0,0 +1,37 @@
+"""Unique currency per price table
+
+Revision ID: 3f7a9c1d2e45
+Revises: b21c663c6926
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a9c1d2e45'
+down_revision: Union[str, None] = 'b21c663c6926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRICE_TABLES = ('vbr_prices', 'investing_prices', 'bitinfo_prices')
+
+
+def upgrade() -> None:
+    for table in PRICE_TABLES:
+        # Оставляем по одной (самой свежей) строке на валюту, иначе ограничение не создать
+        op.execute(f"""
+            DELETE FROM {table} t
+            USING {table} newer
+            WHERE t.currency = newer.currency
+              AND (t.timestamp, t.id) < (newer.timestamp, newer.id)
+        """)
+        op.create_unique_constraint(f'uq_{table}_currency', table, ['currency'])
+
+
+def downgrade() -> None:
+    for table in PRICE_TABLES:
+        op.drop_constraint(f'uq_{table}_currency', table, type_='unique')
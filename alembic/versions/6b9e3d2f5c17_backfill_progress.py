@@ -0,0 +1,35 @@
+"""Backfill progress table
+
+Revision ID: 6b9e3d2f5c17
+Revises: d5a1f0c7b384
+Create Date: 2026-10-18 13:02:55.184726
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b9e3d2f5c17'
+down_revision: Union[str, None] = 'd5a1f0c7b384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backfill_progress',
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('offset', sa.BigInteger(), nullable=False),
+        sa.Column('rows', sa.BigInteger(), nullable=False),
+        sa.Column('first_ts', sa.DateTime(), nullable=True),
+        sa.Column('last_ts', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('path'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_progress')
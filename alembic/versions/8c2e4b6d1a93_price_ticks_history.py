@@ -0,0 +1,41 @@
+"""Partitioned price_ticks history table
+
+Revision ID: 8c2e4b6d1a93
+Revises: 3f7a9c1d2e45
+Create Date: 2026-10-18 11:04:27.640912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2e4b6d1a93'
+down_revision: Union[str, None] = '3f7a9c1d2e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Секции по дням создаёт приложение (app/db/partitions.py) при старте воркера и перед записью
+    op.create_table(
+        'price_ticks',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)',
+    )
+    op.create_index('ix_price_ticks_timestamp_brin', 'price_ticks', ['timestamp'], postgresql_using='brin')
+    op.create_index('ix_price_ticks_currency_timestamp', 'price_ticks', ['currency', 'timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_ticks_currency_timestamp', table_name='price_ticks')
+    op.drop_index('ix_price_ticks_timestamp_brin', table_name='price_ticks')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('price_ticks')
@@ -0,0 +1,46 @@
+"""OHLC rollup tables 1m/1h/1d
+
+Revision ID: a4c8e2f6b019
+Revises: 6b9e3d2f5c17
+Create Date: 2026-10-18 14:37:12.905163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6b019'
+down_revision: Union[str, None] = '6b9e3d2f5c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESOLUTIONS = ('1m', '1h', '1d')
+
+
+def upgrade() -> None:
+    for resolution in RESOLUTIONS:
+        # Минутные свечи секционированы по месяцам; секции создаёт приложение (app/parsing/rollups.py)
+        options = {'postgresql_partition_by': 'RANGE (bucket)'} if resolution == '1m' else {}
+        op.create_table(
+            f'price_ohlc_{resolution}',
+            sa.Column('currency', sa.String(), nullable=False),
+            sa.Column('source', sa.String(), nullable=False),
+            sa.Column('bucket', sa.DateTime(), nullable=False),
+            sa.Column('open', sa.Float(), nullable=False),
+            sa.Column('high', sa.Float(), nullable=False),
+            sa.Column('low', sa.Float(), nullable=False),
+            sa.Column('close', sa.Float(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('first_ts', sa.DateTime(), nullable=False),
+            sa.Column('last_ts', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('currency', 'source', 'bucket'),
+            **options,
+        )
+
+
+def downgrade() -> None:
+    for resolution in reversed(RESOLUTIONS):
+        op.drop_table(f'price_ohlc_{resolution}')
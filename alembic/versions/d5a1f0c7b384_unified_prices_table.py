@@ -0,0 +1,84 @@
+"""Unified prices table with sources lookup
+
+Revision ID: d5a1f0c7b384
+Revises: 8c2e4b6d1a93
+Create Date: 2026-10-18 12:21:09.517330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1f0c7b384'
+down_revision: Union[str, None] = '8c2e4b6d1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Прежние таблицы по источникам: имя источника, заголовок, таблица
+LEGACY_TABLES = (
+    ('vbr', 'VBR', 'vbr_prices'),
+    ('investing', 'Investing', 'investing_prices'),
+    ('bitinfo', 'BitInfo', 'bitinfo_prices'),
+)
+
+
+def upgrade() -> None:
+    sources = op.create_table(
+        'sources',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'prices',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source_id', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['source_id'], ['sources.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_id', 'currency', name='uq_prices_source_currency'),
+    )
+    op.create_index('ix_prices_currency', 'prices', ['currency'])
+
+    op.bulk_insert(sources, [{'name': name, 'title': title} for name, title, _ in LEGACY_TABLES])
+    for name, _, table in LEGACY_TABLES:
+        # Валюты приводим к верхнему регистру: API ищет по точному совпадению через индекс
+        op.execute(f"""
+            INSERT INTO prices (source_id, currency, price, timestamp)
+            SELECT s.id, upper(t.currency), t.price, t.timestamp
+            FROM {table} t JOIN sources s ON s.name = '{name}'
+            ORDER BY t.timestamp DESC
+            ON CONFLICT (source_id, currency) DO NOTHING
+        """)
+        op.drop_table(table)
+
+
+def downgrade() -> None:
+    for name, _, table in LEGACY_TABLES:
+        op.create_table(
+            table,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('currency', sa.String(), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('currency', name=f'uq_{table}_currency'),
+        )
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'])
+        op.create_index(op.f(f'ix_{table}_currency'), table, ['currency'])
+        op.execute(f"""
+            INSERT INTO {table} (currency, price, timestamp)
+            SELECT p.currency, p.price, p.timestamp
+            FROM prices p JOIN sources s ON s.id = p.source_id
+            WHERE s.name = '{name}'
+        """)
+    op.drop_index('ix_prices_currency', table_name='prices')
+    op.drop_table('prices')
+    op.drop_table('sources')
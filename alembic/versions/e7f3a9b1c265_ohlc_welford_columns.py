@@ -0,0 +1,42 @@
+"""OHLC candles: Welford mean and m2, (currency, bucket) index
+
+Revision ID: e7f3a9b1c265
+Revises: a4c8e2f6b019
+Create Date: 2026-10-18 18:02:41.517392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3a9b1c265'
+down_revision: Union[str, None] = 'a4c8e2f6b019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESOLUTIONS = ('1m', '1h', '1d')
+
+
+def upgrade() -> None:
+    for resolution in RESOLUTIONS:
+        table = f'price_ohlc_{resolution}'
+        # На секционированной таблице колонки добавляются и во все секции
+        op.add_column(table, sa.Column('mean', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('m2', sa.Float(), nullable=True))
+        # У существующих свечей отдельных цен уже нет: среднее — по OHLC, разброс внутри свечи — 0.
+        # Точные значения за период с сохранёнными тиками даёт python -m app.parsing.rollups
+        op.execute(f'UPDATE {table} SET mean = (open + high + low + close) / 4, m2 = 0')
+        op.alter_column(table, 'mean', nullable=False)
+        op.alter_column(table, 'm2', nullable=False)
+        # Окно статистики (currency = X AND bucket >= start) без перебора всей истории валюты
+        op.create_index(f'ix_{table}_currency_bucket', table, ['currency', 'bucket'])
+
+
+def downgrade() -> None:
+    for resolution in reversed(RESOLUTIONS):
+        op.drop_index(f'ix_price_ohlc_{resolution}_currency_bucket', table_name=f'price_ohlc_{resolution}')
+        op.drop_column(f'price_ohlc_{resolution}', 'm2')
+        op.drop_column(f'price_ohlc_{resolution}', 'mean')
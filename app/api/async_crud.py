@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.api import crud
+from app.db.async_session import AsyncSessionLocal
+# Асинхронные версии функций app/api/crud.py: те же запросы, но без занятого потока на время запроса к БД
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def login_user(db: AsyncSession, user_data):
+    user = (await db.execute(crud.user_by_email_query(user_data.email))).scalars().first()
+    # Проверка bcrypt в пуле потоков — цикл событий в это время обслуживает другие запросы
+    return await run_in_threadpool(crud.login_result, user, user_data)
+
+async def register_user(db: AsyncSession, user):
+    existing = (await db.execute(crud.user_by_email_query(user.email))).scalars().first()
+    db.add(await run_in_threadpool(crud.new_user, existing, user))
+    await db.commit()
+    return crud.REGISTERED
+
+async def latest_prices(db: AsyncSession, currencies: Optional[list]) -> dict:
+    return crud.group_latest(await db.execute(crud.latest_prices_query(currencies)))
+
+async def get_prices_by_source(db: AsyncSession, source: str):
+    return (await db.execute(crud.prices_by_source_query(source))).scalars().all()
+
+async def compare_prices(db: AsyncSession, currency: str):
+    prices = await latest_prices(db, [currency])
+    return crud.compare_result(currency, prices.get(currency.upper(), {}))
+
+async def compare_many(db: AsyncSession, currencies: Optional[list]):
+    return crud.compare_many_result(currencies, await latest_prices(db, currencies))
+
+async def convert_currency(db: AsyncSession, from_currency: str, to_currency: str, amount: float, source: str):
+    prices = await latest_prices(db, [from_currency, to_currency])
+    prices_from = crud.compare_result(from_currency, prices.get(from_currency.upper(), {}))
+    prices_to = crud.compare_result(to_currency, prices.get(to_currency.upper(), {}))
+    return crud.convert_result(from_currency, to_currency, amount, source, prices_from, prices_to)
+
+async def get_max_price(db: AsyncSession, currency: str, hours: Optional[int] = None):
+    value = (await db.execute(crud.extreme_price_query(currency, hours, "max"))).scalar()
+    return crud.extreme_result(currency, "max_price", value)
+
+async def get_min_price(db: AsyncSession, currency: str, hours: Optional[int] = None):
+    value = (await db.execute(crud.extreme_price_query(currency, hours, "min"))).scalar()
+    return crud.extreme_result(currency, "min_price", value)
+
+async def get_ohlc(db: AsyncSession, currency: str, resolution: str = "1h", start: Optional[datetime] = None,
+                   end: Optional[datetime] = None, source: Optional[str] = None, limit: int = 1000):
+    query = crud.ohlc_query(currency, resolution, start, end, source, limit)
+    return crud.ohlc_result((await db.execute(query)).scalars().all())
+
+async def get_stats(db: AsyncSession, currency: str, window: str = "24h"):
+    return crud.stats_result(currency, window, (await db.execute(crud.stats_query(currency, window))).all())
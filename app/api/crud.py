@@ -254,15 +254,19 @@
 
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, Depends, status
-from ..models.models import User, VBRPrice, InvestingPrice, BitInfoPrice
+from ..models.models import User, Source, Price, PriceTick, PriceOhlc1m, PriceOhlc1h, PriceOhlc1d
+from ..parsing.sources import SOURCES, SOURCES_BY_NAME, SOURCES_BY_TITLE
 from ..schemas.schemas import UserCreate, CryptoPrice, UserLogin
-from ..models.database import SessionLocal
+from ..db.session import SessionLocal
+from ..parsing.rollups import RESOLUTIONS
+from ..service.stats import RunningStats
 from ..service.utils import hash_password, verify_password, create_access_token
 from jose import JWTError, jwt
 from ..service.utils import SECRET_KEY, ALGORITHM
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
-from sqlalchemy import literal_column
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
 
 # Аутентификация
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -292,126 +296,244 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     return user
 
-def login_user(db: Session, user_data: UserLogin):
-    user = db.query(User).filter(User.email == user_data.email).first()
+def user_by_email_query(email: str):
+    return select(User).where(User.email == email)
+
+def login_result(user: Optional[User], user_data: UserLogin) -> dict:
+    # bcrypt — долгая работа CPU: асинхронная версия зовёт её в пуле потоков
     if not user or not verify_password(user_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token(data={"sub": user.email})
     return {"token": access_token}
 
-def register_user(db: Session, user: UserCreate):
-    existing_email = db.query(User).filter(User.email == user.email).first()
-    if existing_email:
+def new_user(existing: Optional[User], user: UserCreate) -> User:
+    if existing:
         raise HTTPException(status_code=400, detail="Емейл занят, сорян")
     hashed_password = hash_password(user.password)
-    new_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
-    db.add(new_user)
+    return User(username=user.username, email=user.email, hashed_password=hashed_password)
+
+REGISTERED = {"message": "Зарегался, можешь входить"}
+
+def login_user(db: Session, user_data: UserLogin):
+    return login_result(db.execute(user_by_email_query(user_data.email)).scalars().first(), user_data)
+
+def register_user(db: Session, user: UserCreate):
+    db.add(new_user(db.execute(user_by_email_query(user.email)).scalars().first(), user))
     db.commit()
-    db.refresh(new_user)
-    return {"message": "Зарегался, можешь входить"}
+    return REGISTERED
 
-def get_prices_by_source(db: Session, source: str, current_user: User = Depends(get_current_user)):
-    if source == "vbr":
-        return db.query(VBRPrice).all()
-    elif source == "investing":
-        return db.query(InvestingPrice).all()
-    elif source == "bitinfo":
-        return db.query(BitInfoPrice).all()
-    else:
+# Запросы и разбор их результатов отделены от выполнения: синхронные функции ниже
+# и асинхронные в app/api/async_crud.py выполняют одни и те же запросы
+
+def prices_by_source_query(source: str):
+    if source not in SOURCES_BY_NAME:
         raise HTTPException(status_code=400, detail="Invalid source")
+    return select(Price).join(Price.source).where(Source.name == source)
 
-def compare_prices(db: Session, currency: str, current_user: User = Depends(get_current_user)):
-    vbr = db.query(VBRPrice).filter(VBRPrice.currency.ilike(currency)).order_by(VBRPrice.timestamp.desc()).first()
-    investing = db.query(InvestingPrice).filter(InvestingPrice.currency.ilike(currency)).order_by(InvestingPrice.timestamp.desc()).first()
-    bitinfo = db.query(BitInfoPrice).filter(BitInfoPrice.currency.ilike(currency)).order_by(BitInfoPrice.timestamp.desc()).first()
-    if not (vbr or investing or bitinfo):
+def get_prices_by_source(db: Session, source: str, current_user: User = Depends(get_current_user)):
+    return db.execute(prices_by_source_query(source)).scalars().all()
+
+def latest_prices_query(currencies: Optional[list]):
+    """
+    Последние цены валют во всех источниках одним запросом по индексу ix_prices_currency;
+    currencies=None — все валюты. В prices одна строка на (источник, валюта), поэтому
+    DISTINCT ON / оконные функции по истории не нужны.
+    """
+    query = select(Price.currency, Source.name, Price.price).join(Price.source)
+    if currencies is not None:
+        query = query.where(Price.currency.in_([currency.upper() for currency in currencies]))
+    return query
+
+def group_latest(rows) -> dict:
+    """
+    Строки latest_prices_query -> {ВАЛЮТА: {источник: цена}}.
+    """
+    prices = {}
+    for currency, source, price in rows:
+        prices.setdefault(currency, {})[source] = price
+    return prices
+
+def latest_prices(db: Session, currency: str) -> dict:
+    return group_latest(db.execute(latest_prices_query([currency]))).get(currency.upper(), {})
+
+def compare_result(currency: str, prices: dict) -> dict:
+    if not prices:
         raise HTTPException(status_code=404, detail="Currency not found in any source")
     return {
         "currency": currency,
-        "prices": {
-            "vbr": vbr.price if vbr else None,
-            "investing": investing.price if investing else None,
-            "bitinfo": bitinfo.price if bitinfo else None
-        }
+        "prices": {source.name: prices.get(source.name) for source in SOURCES}
     }
 
-def convert_currency(db: Session, from_currency: str, to_currency: str, amount: float, source: str, current_user: User = Depends(get_current_user)):
-    # Получаем цены обеих валют
-    prices_from = compare_prices(db, from_currency)
-    prices_to = compare_prices(db, to_currency)
+def compare_prices(db: Session, currency: str, current_user: User = Depends(get_current_user)):
+    return compare_result(currency, latest_prices(db, currency))
+
+# Сколько валют можно запросить в одном пакетном сравнении
+MAX_COMPARE_SYMBOLS = 500
+
+def parse_symbols(symbols: str) -> Optional[list]:
+    """
+    "BTC,eth, SOL" -> ["BTC", "ETH", "SOL"]; "all" -> None (все валюты).
+    """
+    if symbols.strip().lower() == "all":
+        return None
+    currencies = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    if not currencies:
+        raise HTTPException(status_code=400, detail="symbols must list currencies or be 'all'")
+    if len(currencies) > MAX_COMPARE_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Too many symbols, max {MAX_COMPARE_SYMBOLS}")
+    return currencies
+
+def compare_many_result(currencies: Optional[list], prices: dict) -> dict:
+    """
+    Результат пакетного сравнения; валюты, которых нет ни в одном источнике, — в missing.
+    """
+    if currencies is None:
+        currencies = sorted(prices)
+    return {
+        "prices": [
+            {"currency": currency, "prices": {source.name: prices[currency].get(source.name) for source in SOURCES}}
+            for currency in currencies if currency in prices
+        ],
+        "missing": [currency for currency in currencies if currency not in prices],
+    }
+
+def compare_many(db: Session, currencies: Optional[list]):
+    return compare_many_result(currencies, group_latest(db.execute(latest_prices_query(currencies))))
 
+def convert_result(from_currency: str, to_currency: str, amount: float, source: str, prices_from: dict, prices_to: dict) -> dict:
     rate_from = prices_from["prices"].get(source.lower())
     rate_to = prices_to["prices"].get(source.lower())
 
     if rate_from is None or rate_to is None:
         raise HTTPException(status_code=404, detail=f"No data for source {source}")
 
-    # Формула конверсии
-    converted_price = round((amount * rate_from) / rate_to, 8)  # Дробные значения для точности
+    return conversion_result(from_currency, to_currency, amount, rate_from / rate_to)
 
+def conversion_result(from_currency: str, to_currency: str, amount: float, rate: float) -> dict:
     return {
         "from_currency": from_currency,
         "to_currency": to_currency,
-        "rate": round(rate_from / rate_to, 8),  # Сам курс обмена
-        "converted_price": converted_price
+        "rate": round(rate, 8),  # Сам курс обмена
+        "converted_price": round(amount * rate, 8)  # Дробные значения для точности
     }
 
-
-def get_max_price(db: Session, currency: str, current_user: User = Depends(get_current_user)):
-    vbr_max = db.query(VBRPrice).filter(VBRPrice.currency.ilike(currency)).order_by(VBRPrice.price.desc()).first()
-    investing_max = db.query(InvestingPrice).filter(InvestingPrice.currency.ilike(currency)).order_by(InvestingPrice.price.desc()).first()
-    bitinfo_max = db.query(BitInfoPrice).filter(BitInfoPrice.currency.ilike(currency)).order_by(BitInfoPrice.price.desc()).first()
-    max_price = max([p.price for p in [vbr_max, investing_max, bitinfo_max] if p], default=None)
-    if max_price is None:
-        raise HTTPException(status_code=404, detail="Currency not found in any source")
-    return {"currency": currency, "max_price": max_price}
-
-def get_min_price(db: Session, currency: str, current_user: User = Depends(get_current_user)):
-    vbr_min = db.query(VBRPrice).filter(VBRPrice.currency.ilike(currency)).order_by(VBRPrice.price.asc()).first()
-    investing_min = db.query(InvestingPrice).filter(InvestingPrice.currency.ilike(currency)).order_by(InvestingPrice.price.asc()).first()
-    bitinfo_min = db.query(BitInfoPrice).filter(BitInfoPrice.currency.ilike(currency)).order_by(BitInfoPrice.price.asc()).first()
-    min_price = min([p.price for p in [vbr_min, investing_min, bitinfo_min] if p], default=None)
-    if min_price is None:
+def convert_currency(db: Session, from_currency: str, to_currency: str, amount: float, source: str, current_user: User = Depends(get_current_user)):
+    # Цены обеих валют одним запросом
+    prices = group_latest(db.execute(latest_prices_query([from_currency, to_currency])))
+    prices_from = compare_result(from_currency, prices.get(from_currency.upper(), {}))
+    prices_to = compare_result(to_currency, prices.get(to_currency.upper(), {}))
+    return convert_result(from_currency, to_currency, amount, source, prices_from, prices_to)
+
+
+def price_history(currency: str, hours: Optional[int] = None):
+    """
+    Цены валюты из истории price_ticks; hours — только за последние N часов.
+    Условие по currency и timestamp идёт по индексу (currency, timestamp) и отсекает лишние секции.
+    """
+    query = select(PriceTick.price).where(PriceTick.currency == currency.upper())
+    if hours is not None:
+        query = query.where(PriceTick.timestamp >= datetime.utcnow() - timedelta(hours=hours))
+    return query.subquery()
+
+# Экстремум -> (агрегат, колонка дневной свечи)
+EXTREMES = {"max": (func.max, "high"), "min": (func.min, "low")}
+
+def extreme_price_query(currency: str, hours: Optional[int], extreme: str):
+    """
+    Без hours — по дневным свечам: они пишутся в одной транзакции с тиками, поэтому
+    max(high)/min(low) точны, читается строка на день и источник, а не все секции price_ticks,
+    и учитываются дни, тики которых уже удалены по сроку хранения.
+    С hours — по тикам за окно (см. price_history).
+    """
+    aggregate, column = EXTREMES[extreme]
+    if hours is None:
+        return select(aggregate(getattr(PriceOhlc1d, column))).where(PriceOhlc1d.currency == currency.upper())
+    prices = price_history(currency, hours)
+    return select(aggregate(prices.c.price))
+
+def extreme_result(currency: str, key: str, value) -> dict:
+    if value is None:
         raise HTTPException(status_code=404, detail="Currency not found in any source")
-    return {"currency": currency, "min_price": min_price}
-
-def filter_prices(db: Session, min_price: float, max_price: float, source: Optional[str] = None):
-    if min_price is None or max_price is None:
-        raise HTTPException(status_code=400, detail="Both min_price and max_price are required.")
-
-    try:
-        min_price = float(min_price)
-        max_price = float(max_price)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="min_price and max_price must be valid numbers")
-
-    queries = []
-    valid_sources = {"VBR", "Investing", "BitInfo"}
-
-    if source and source not in valid_sources:
-        raise HTTPException(status_code=400, detail="Invalid source. Valid sources: VBR, Investing, BitInfo")
-
-    if not source or source == "VBR":
-        query = db.query(VBRPrice.currency, VBRPrice.price, literal_column("'VBR'").label("source"))
-        query = query.filter(VBRPrice.price >= min_price, VBRPrice.price <= max_price)
-        queries.append(query)
-
-    if not source or source == "Investing":
-        query = db.query(InvestingPrice.currency, InvestingPrice.price, literal_column("'Investing'").label("source"))
-        query = query.filter(InvestingPrice.price >= min_price, InvestingPrice.price <= max_price)
-        queries.append(query)
-
-    if not source or source == "BitInfo":
-        query = db.query(BitInfoPrice.currency, BitInfoPrice.price, literal_column("'BitInfo'").label("source"))
-        query = query.filter(BitInfoPrice.price >= min_price, BitInfoPrice.price <= max_price)
-        queries.append(query)
-
-    if not queries:
-        raise HTTPException(status_code=400, detail="No valid queries generated")
-
-    results = queries[0].union(*queries[1:]).all() if len(queries) > 1 else queries[0].all()
+    return {"currency": currency, key: value}
+
+def get_max_price(db: Session, currency: str, hours: Optional[int] = None, current_user: User = Depends(get_current_user)):
+    return extreme_result(currency, "max_price", db.execute(extreme_price_query(currency, hours, "max")).scalar())
+
+def get_min_price(db: Session, currency: str, hours: Optional[int] = None, current_user: User = Depends(get_current_user)):
+    return extreme_result(currency, "min_price", db.execute(extreme_price_query(currency, hours, "min")).scalar())
+
+OHLC_MODELS = {"1m": PriceOhlc1m, "1h": PriceOhlc1h, "1d": PriceOhlc1d}
+
+def ohlc_query(currency: str, resolution: str = "1h", start: Optional[datetime] = None,
+               end: Optional[datetime] = None, source: Optional[str] = None, limit: int = 1000):
+    """
+    Свечи валюты из таблицы нужного разрешения — без сканирования сырых тиков.
+    """
+    model = OHLC_MODELS.get(resolution)
+    if model is None:
+        raise HTTPException(status_code=400, detail=f"Invalid resolution. Valid: {', '.join(OHLC_MODELS)}")
+    query = select(model).where(model.currency == currency.upper())
+    if source:
+        query = query.where(model.source == source)
+    if start is not None:
+        query = query.where(model.bucket >= start)
+    if end is not None:
+        query = query.where(model.bucket < end)
+    return query.order_by(model.source, model.bucket).limit(limit)
+
+def ohlc_result(candles: list) -> list:
+    if not candles:
+        raise HTTPException(status_code=404, detail="No candles found for the specified range")
+    return [
+        {"source": c.source, "bucket": c.bucket, "open": c.open, "high": c.high, "low": c.low, "close": c.close, "count": c.count}
+        for c in candles
+    ]
+
+def get_ohlc(db: Session, currency: str, resolution: str = "1h", start: Optional[datetime] = None,
+             end: Optional[datetime] = None, source: Optional[str] = None, limit: int = 1000):
+    return ohlc_result(db.execute(ohlc_query(currency, resolution, start, end, source, limit)).scalars().all())
+
+# Окно статистики -> (разрешение свечей, длина окна). Свечей на источник не больше 168,
+# поэтому время ответа не растёт вместе с историей
+STATS_WINDOWS = {
+    "1h": ("1m", timedelta(hours=1)),
+    "24h": ("1h", timedelta(hours=24)),
+    "7d": ("1h", timedelta(days=7)),
+    "30d": ("1d", timedelta(days=30)),
+}
+
+def stats_query(currency: str, window: str):
+    """
+    Свечи валюты за окно; окно начинается с границы свечи, в которую попадает now - window.
+    """
+    if window not in STATS_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Invalid window. Valid: {', '.join(STATS_WINDOWS)}")
+    resolution, length = STATS_WINDOWS[window]
+    model = OHLC_MODELS[resolution]
+    truncate = RESOLUTIONS[resolution][2]
+    start = truncate(datetime.utcnow() - length)
+    return select(
+        model.source, model.count, model.mean, model.m2, model.low, model.high, model.close, model.last_ts
+    ).where(model.currency == currency.upper(), model.bucket >= start)
+
+def stats_result(currency: str, window: str, candles: list) -> dict:
+    """
+    Сливает свечи окна по источникам и по всем источникам вместе (см. app/service/stats.py).
+    """
+    if not candles:
+        raise HTTPException(status_code=404, detail="No prices for the specified window")
+    by_source = {}
+    for source, count, mean, m2, low, high, close, last_ts in candles:
+        by_source.setdefault(source, RunningStats()).merge(count, mean, m2, low, high, close, last_ts)
+    overall = RunningStats()
+    for stats in by_source.values():
+        overall.merge_stats(stats)
+    return {
+        "currency": currency,
+        "window": window,
+        "sources": {source: stats.as_dict() for source, stats in sorted(by_source.items())},
+        "overall": overall.as_dict(),
+    }
 
-    if not results:
-        raise HTTPException(status_code=404, detail="No results found in the specified price range")
-    
-    return [{"currency": r.currency, "price": r.price, "source": r.source} for r in results]
\ No newline at end of file
+def get_stats(db: Session, currency: str, window: str = "24h"):
+    return stats_result(currency, window, db.execute(stats_query(currency, window)).all())
@@ -65,8 +65,10 @@
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.api.crud import get_db
-from app.api import crud
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.async_crud import get_async_db
+from app.api import crud, async_crud, snapshot
 from app.schemas import schemas
 from app.service.utils import verify_token
 from fastapi.security import OAuth2PasswordBearer
@@ -76,64 +78,108 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
-from app.models.models import VBRPrice, InvestingPrice, BitInfoPrice
-from sqlalchemy.sql.expression import literal_column
-from sqlalchemy.sql import literal
 
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 @router.post("/convert")
-def convert_currency_endpoint(
+async def convert_currency_endpoint(
     request: schemas.ConvertRequest, 
-    db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
     user = verify_token(token)
     if not request.source:
         raise HTTPException(status_code=400, detail="Source is required")
     
-    result = crud.convert_currency(db, request.from_currency, request.to_currency, request.amount, request.source)
+    # Из среза последних цен в памяти процесса, без запроса к БД
+    result = await snapshot.convert_currency(request.from_currency, request.to_currency, request.amount, request.source)
     return result
 
+@router.get("/convert/matrix")
+async def convert_matrix(
+    source: str,
+    symbols: Optional[str] = Query(None, description="валюты через запятую; по умолчанию все"),
+    token: str = Depends(oauth2_scheme),
+):
+    verify_token(token)
+    return await snapshot.rate_matrix(source, crud.parse_symbols(symbols) if symbols else None)
+
+@router.post("/convert/batch")
+async def convert_batch(request: schemas.ConvertBatchRequest, token: str = Depends(oauth2_scheme)):
+    verify_token(token)
+    return await snapshot.convert_batch(request.source, request.items)
+
 @router.get("/dashboard")
 def get_dashboard(token: str = Depends(oauth2_scheme)):
     user = verify_token(token)
     return {"message": "Welcome to your dashboard!", "user_email": user["sub"]}
 
 @router.post("/login")
-def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
-    return crud.login_user(db, user_data)
+async def login(user_data: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.login_user(db, user_data)
 
 @router.post("/register")
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.register_user(db, user)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.register_user(db, user)
+
+# Объявлен раньше /prices/{source}, иначе "compare" примется за имя источника
+@router.get("/prices/compare")
+async def compare_many(
+    symbols: str = Query(..., description="валюты через запятую или all"),
+    token: str = Depends(oauth2_scheme),
+):
+    verify_token(token)
+    return await snapshot.compare_many(crud.parse_symbols(symbols))
 
 @router.get("/prices/{source}", response_model=List[schemas.CryptoPrice])
-def get_prices_by_source(source: str, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_prices_by_source(source: str, db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
     verify_token(token)
-    return crud.get_prices_by_source(db, source)
+    return await async_crud.get_prices_by_source(db, source)
 
 @router.get("/prices/compare/{currency}")
-def compare_prices(currency: str, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def compare_prices(currency: str, token: str = Depends(oauth2_scheme)):
     verify_token(token)
-    return crud.compare_prices(db, currency)
+    return await snapshot.compare_prices(currency)
 
 @router.get("/prices/max/{currency}")
-def get_max_price(currency: str, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_max_price(currency: str, hours: Optional[int] = Query(None, gt=0), db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
     verify_token(token)
-    return crud.get_max_price(db, currency)
+    return await async_crud.get_max_price(db, currency, hours)
 
 @router.get("/prices/min/{currency}")
-def get_min_price(currency: str, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+async def get_min_price(currency: str, hours: Optional[int] = Query(None, gt=0), db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    verify_token(token)
+    return await async_crud.get_min_price(db, currency, hours)
+
+@router.get("/prices/stats/{currency}")
+async def get_stats(
+    currency: str,
+    window: str = Query("24h", description="1h, 24h, 7d или 30d"),
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
+):
     verify_token(token)
-    return crud.get_min_price(db, currency)
+    return await async_crud.get_stats(db, currency, window)
+
+@router.get("/prices/ohlc/{currency}")
+async def get_ohlc(
+    currency: str,
+    resolution: str = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    limit: int = Query(1000, gt=0, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
+):
+    verify_token(token)
+    return await async_crud.get_ohlc(db, currency, resolution, start, end, source, limit)
 
 
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
@@ -143,57 +189,13 @@ class PriceFilterRequest(BaseModel):
     min_price: float
     max_price: float
     source: Optional[str] = None  # Источник (необязательный параметр)
+    limit: int = Field(100, gt=0, le=snapshot.MAX_FILTER_PAGE)  # Строк на странице
+    cursor: Optional[str] = None  # next_cursor предыдущей страницы
 
 @router.post("/prices/filter")
-def filter_prices(
+async def filter_prices(
     request: PriceFilterRequest,
-    db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
     verify_token(token)
-
-    min_price = request.min_price
-    max_price = request.max_price
-    source = request.source
-
-    valid_sources = {"VBR", "Investing", "BitInfo"}
-
-    if source and source not in valid_sources:
-        raise HTTPException(status_code=400, detail="Invalid source. Valid sources: VBR, Investing, BitInfo")
-
-    queries = []
-
-    if not source or source == "VBR":
-        query = db.query(
-            VBRPrice.currency, 
-            VBRPrice.price, 
-            literal("VBR").label("source")  # Исправлено
-        ).filter(VBRPrice.price >= min_price, VBRPrice.price <= max_price)
-        queries.append(query)
-
-    if not source or source == "Investing":
-        query = db.query(
-            InvestingPrice.currency, 
-            InvestingPrice.price, 
-            literal("Investing").label("source")  # Исправлено
-        ).filter(InvestingPrice.price >= min_price, InvestingPrice.price <= max_price)
-        queries.append(query)
-
-    if not source or source == "BitInfo":
-        query = db.query(
-            BitInfoPrice.currency, 
-            BitInfoPrice.price, 
-            literal("BitInfo").label("source")  # Исправлено
-        ).filter(BitInfoPrice.price >= min_price, BitInfoPrice.price <= max_price)
-        queries.append(query)
-
-    if not queries:
-        raise HTTPException(status_code=400, detail="No valid queries generated")
-
-    # Выполняем объединение запросов и получаем результат
-    results = queries[0].union(*queries[1:]).all() if len(queries) > 1 else queries[0].all()
-
-    if not results:
-        raise HTTPException(status_code=404, detail="No results found in the specified price range")
-
-    return [{"currency": r.currency, "price": r.price, "source": r.source} for r in results]
\ No newline at end of file
+    return await snapshot.filter_prices(request.min_price, request.max_price, request.source, request.cursor, request.limit)
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import time
+from typing import Optional
+import dotenv
+from sqlalchemy import select
+from app.api import crud
+from app.db.async_session import AsyncSessionLocal
+from app.models.models import Source, Price
+from app.service.pubsub import PRICES_CHANNEL
+from app.service.price_index import encode_cursor, decode_cursor
+from app.service.price_snapshot import PriceSnapshot
+from app.parsing.sources import SOURCES_BY_NAME, SOURCES_BY_TITLE
+from fastapi import HTTPException
+
+dotenv.load_dotenv()
+
+# Срез старше SNAPSHOT_MAX_AGE секунд не используется: цены перечитываются из таблицы prices.
+# Воркер публикует срез каждый цикл (раз в 120 с), так что при живом воркере срез свежий
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", 300))
+
+
+class SnapshotStore:
+    """
+    Текущий срез цен процесса API. Срез подменяется целиком одним присваиванием,
+    когда воркер публикует новую версию; если публикаций давно не было (воркер или
+    Redis недоступны), срез перечитывается из БД — устаревание ограничено max_age.
+    """
+    def __init__(self, max_age: float = SNAPSHOT_MAX_AGE, session_factory=AsyncSessionLocal):
+        self.max_age = max_age
+        self.session_factory = session_factory
+        self.current = None
+        self.lock = asyncio.Lock()
+        self.stats = {"hits": 0, "published": 0, "reloads": 0, "ignored": 0}
+
+    def fresh(self, snapshot) -> bool:
+        return snapshot is not None and snapshot.age() <= self.max_age
+
+    async def get(self) -> PriceSnapshot:
+        snapshot = self.current
+        if self.fresh(snapshot):
+            self.stats["hits"] += 1
+            return snapshot
+        # Перечитывает один запрос, остальные ждут его результата
+        async with self.lock:
+            snapshot = self.current
+            if not self.fresh(snapshot):
+                snapshot = await self.reload()
+        return snapshot
+
+    async def reload(self) -> PriceSnapshot:
+        async with self.session_factory() as db:
+            rows = await db.execute(select(Price.currency, Source.name, Price.price).join(Price.source))
+            prices = crud.group_latest(rows)
+        current = self.current
+        if self.fresh(current):
+            # Пока шёл запрос, воркер успел опубликовать срез — он новее таблицы
+            return current
+        snapshot = PriceSnapshot(current.version if current else 0, time.time(), prices).prepare()
+        self.current = snapshot
+        self.stats["reloads"] += 1
+        return snapshot
+
+    def apply(self, message) -> bool:
+        snapshot = PriceSnapshot.from_message(message)
+        current = self.current
+        if current is not None and snapshot.version <= current.version:
+            # Запоздавшее сообщение о старой версии
+            self.stats["ignored"] += 1
+            return False
+        # Матрицы курсов и индекс цен строятся до подмены — запросы сразу получают готовые
+        snapshot.prepare()
+        self.current = snapshot
+        self.stats["published"] += 1
+        return True
+
+    async def listen(self, pubsub, channel: str = PRICES_CHANNEL):
+        """
+        Подписка на публикации воркера; при обрыве переподключается.
+        """
+        while True:
+            try:
+                async for message in pubsub.subscribe(channel):
+                    self.apply(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Подписка на срезы цен: {e}")
+            await asyncio.sleep(1)
+
+    def report(self) -> dict:
+        current = self.current
+        return {
+            **self.stats,
+            "version": current.version if current else None,
+            "age": round(current.age(), 1) if current else None,
+        }
+
+
+# Общий срез процесса API
+price_snapshot = SnapshotStore()
+
+
+async def compare_prices(currency: str):
+    snapshot = await price_snapshot.get()
+    return crud.compare_result(currency, snapshot.prices.get(currency.upper(), {}))
+
+
+async def compare_many(currencies: Optional[list]):
+    snapshot = await price_snapshot.get()
+    return crud.compare_many_result(currencies, snapshot.prices)
+
+
+def source_rates(snapshot: PriceSnapshot, source: str):
+    matrix = snapshot.rates().get(source.lower())
+    if matrix is None:
+        raise HTTPException(status_code=404, detail=f"No data for source {source}")
+    return matrix
+
+
+async def convert_currency(from_currency: str, to_currency: str, amount: float, source: str):
+    snapshot = await price_snapshot.get()
+    for currency in (from_currency, to_currency):
+        if currency.upper() not in snapshot.prices:
+            raise HTTPException(status_code=404, detail="Currency not found in any source")
+    try:
+        rate = source_rates(snapshot, source).rate(from_currency.upper(), to_currency.upper())
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No data for source {source}")
+    return crud.conversion_result(from_currency, to_currency, amount, rate)
+
+
+async def rate_matrix(source: str, currencies: Optional[list]):
+    snapshot = await price_snapshot.get()
+    symbols, matrix = source_rates(snapshot, source).submatrix(currencies)
+    return {"source": source, "version": snapshot.version, "symbols": symbols, "rates": matrix.round(8).tolist()}
+
+
+async def convert_batch(source: str, items: list):
+    """
+    Пакет конверсий одной векторной операцией над матрицей курсов источника.
+    Для пар, которых нет у источника, rate и converted_price — None.
+    """
+    snapshot = await price_snapshot.get()
+    rates, converted = source_rates(snapshot, source).convert_many(
+        [item.from_currency.upper() for item in items],
+        [item.to_currency.upper() for item in items],
+        [item.amount for item in items],
+    )
+    rates, converted = rates.round(8).tolist(), converted.round(8).tolist()
+    return {
+        "source": source,
+        "version": snapshot.version,
+        "results": [
+            {
+                "from_currency": item.from_currency,
+                "to_currency": item.to_currency,
+                "rate": None if rate != rate else rate,  # NaN — нет курса
+                "converted_price": None if price != price else price,
+            }
+            for item, rate, price in zip(items, rates, converted)
+        ],
+    }
+
+
+# Наибольший размер страницы поиска по диапазону цен
+MAX_FILTER_PAGE = 1000
+
+
+async def filter_prices(min_price: float, max_price: float, source: Optional[str] = None,
+                        cursor: Optional[str] = None, limit: int = 100):
+    """
+    Цены из [min_price, max_price] по возрастанию, страницами по limit строк.
+    next_cursor передаётся в следующий запрос; None — страниц больше нет.
+    """
+    if source and source not in SOURCES_BY_TITLE:
+        raise HTTPException(status_code=400, detail=f"Invalid source. Valid sources: {', '.join(SOURCES_BY_TITLE)}")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    snapshot = await price_snapshot.get()
+    rows, more = snapshot.index().page(
+        min_price, max_price, SOURCES_BY_TITLE[source].name if source else None, after, min(limit, MAX_FILTER_PAGE)
+    )
+    if not rows and after is None:
+        raise HTTPException(status_code=404, detail="No results found in the specified price range")
+    return {
+        "results": [
+            {"currency": currency, "price": price, "source": SOURCES_BY_NAME[name].title if name in SOURCES_BY_NAME else name}
+            for price, name, currency in rows
+        ],
+        "next_cursor": encode_cursor(rows[-1]) if more else None,
+    }
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends, FastAPI
+from app.api import crud, async_crud, snapshot
+from app.parsing.config import TRACKED_SYMBOLS
+# python -m app.benchmarks.api_load --requests 5000 --concurrency 100
+# Нужен доступный PostgreSQL с данными в prices (POSTGRES_* из .env).
+# Оба приложения обслуживают один и тот же запрос сравнения цен без авторизации:
+# синхронное — через пул потоков и get_db, асинхронное — через asyncpg и get_async_db,
+# snapshot — из среза цен в памяти (первый запрос читает срез из БД).
+
+
+def sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/compare/{currency}")
+    def compare(currency: str, db=Depends(crud.get_db)):
+        return crud.compare_prices(db, currency)
+
+    return app
+
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/compare/{currency}")
+    async def compare(currency: str, db=Depends(async_crud.get_async_db)):
+        return await async_crud.compare_prices(db, currency)
+
+    return app
+
+
+def snapshot_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/compare/{currency}")
+    async def compare(currency: str):
+        return await snapshot.compare_prices(currency)
+
+    return app
+
+
+async def load(app: FastAPI, total: int, concurrency: int, symbols: list) -> dict:
+    """
+    total запросов, не больше concurrency одновременно. Возвращает запросы/с и перцентили задержки.
+    """
+    latencies = []
+    errors = 0
+    queue = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for number in queue:
+                started = time.perf_counter()
+                response = await client.get(f"/compare/{symbols[number % len(symbols)]}")
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code >= 500
+
+        await asyncio.gather(*(worker() for _ in range(min(20, concurrency))))  # прогрев пулов
+        latencies.clear()
+        queue = iter(range(total))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Нагрузка на сравнение цен: синхронный и асинхронный доступ к БД")
+    arg_parser.add_argument("--requests", type=int, default=5000)
+    arg_parser.add_argument("--concurrency", default="10,100", help="через запятую")
+    args = arg_parser.parse_args()
+
+    symbols = TRACKED_SYMBOLS or ["BTC", "ETH"]
+    print(f"{'путь':>9}{'параллельно':>13}{'запросов/с':>12}{'p50, мс':>10}{'p99, мс':>10}{'ошибок':>8}")
+    for concurrency in map(int, args.concurrency.split(",")):
+        for label, factory in (("sync", sync_app), ("async", async_app), ("snapshot", snapshot_app)):
+            result = asyncio.run(load(factory(), args.requests, concurrency, symbols))
+            print(
+                f"{label:>9}{concurrency:>13}{result['rps']:>12.0f}"
+                f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
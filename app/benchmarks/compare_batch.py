@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+from fastapi import HTTPException
+from app.api import async_crud, snapshot
+from app.db.async_session import AsyncSessionLocal
+# python -m app.benchmarks.compare_batch --symbols 50 --rounds 20
+# Нужен доступный PostgreSQL с данными в prices (POSTGRES_* из .env).
+# Сравнивает цены N валют: N вызовов сравнения по одной валюте против одного пакетного запроса.
+
+
+async def looped(currencies: list) -> int:
+    found = 0
+    async with AsyncSessionLocal() as db:
+        for currency in currencies:
+            try:
+                await async_crud.compare_prices(db, currency)
+                found += 1
+            except HTTPException:
+                pass
+    return found
+
+
+async def batch(currencies: list) -> int:
+    async with AsyncSessionLocal() as db:
+        return len((await async_crud.compare_many(db, currencies))["prices"])
+
+
+async def from_snapshot(currencies: list) -> int:
+    return len((await snapshot.compare_many(currencies))["prices"])
+
+
+async def measure(function, currencies: list, rounds: int) -> tuple:
+    found = await function(currencies)  # прогрев пула и среза
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await function(currencies)
+    return (time.perf_counter() - started) * 1000 / rounds, found
+
+
+async def run(symbols: int, rounds: int):
+    async with AsyncSessionLocal() as db:
+        prices = await async_crud.latest_prices(db, None)
+    currencies = sorted(prices)[:symbols]
+    print(f"Валют: {len(currencies)}, повторов: {rounds}")
+    for label, function, queries in (
+        ("по одной", looped, len(currencies)),
+        ("пакетом", batch, 1),
+        ("из среза", from_snapshot, 0),
+    ):
+        milliseconds, found = await measure(function, currencies, rounds)
+        print(f"{label:>10}: {milliseconds:8.2f} мс на {found} валют, запросов к БД: {queries}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Пакетное сравнение цен против цикла по валютам")
+    arg_parser.add_argument("--symbols", type=int, default=50)
+    arg_parser.add_argument("--rounds", type=int, default=20)
+    args = arg_parser.parse_args()
+    asyncio.run(run(args.symbols, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import time
+from functools import partial
+import tracemalloc
+from pathlib import Path
+from app.parsing.engines import ENGINES
+from app.parsing.parsing import CryptoScraper
+# python -m app.benchmarks.engines <папка с vbr.html, investing.html, bitinfo.html>
+
+
+def load_pages(directory: str) -> dict:
+    """
+    Читает сохранённые страницы источников: <папка>/<источник>.html.
+    """
+    pages = {}
+    for name in CryptoScraper().sources:
+        path = Path(directory) / f"{name}.html"
+        if path.exists():
+            pages[name] = path.read_text(encoding="utf-8")
+    if not pages:
+        raise SystemExit(f"В {directory} нет сохранённых страниц (*.html)")
+    return pages
+
+
+def measure(parser, html: str, repeat: int):
+    """
+    Среднее время разбора (мс) и пик памяти Python-кучи за один разбор (КБ).
+    tracemalloc не видит память C-библиотек, поэтому для lxml/selectolax
+    пик показывает только Python-часть.
+    """
+    data = parser(html)  # прогрев: импорт движка, компиляция селекторов
+
+    tracemalloc.start()
+    parser(html)
+    peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parser(html)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    return elapsed_ms, peak_kb, data
+
+
+def benchmark_engines(pages: dict, repeat: int) -> dict:
+    """
+    Разбирает каждую страницу каждым движком в обычном и целевом режиме.
+    Возвращает {(движок, целевой): {источник: (мс, КБ, результат)}}.
+    """
+    results = {}
+    for engine_name in ENGINES:
+        for targeted in (False, True):
+            scraper = CryptoScraper(engine=engine_name, targeted=targeted)
+            results[engine_name, targeted] = {
+                name: measure(partial(scraper.parse_source, scraper.sources[name]), html, repeat)
+                for name, html in pages.items()
+            }
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Сравнение движков разбора HTML на сохранённых страницах")
+    arg_parser.add_argument("directory")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    pages = load_pages(args.directory)
+    results = benchmark_engines(pages, args.repeat)
+
+    baseline = results["html.parser", False]
+    header = "".join(f"{name + ', мс':>16}{name + ', КБ':>16}" for name in pages)
+    print(f"{'движок':<14}{'режим':<10}{header}  совпадает")
+    for (engine_name, targeted), per_source in results.items():
+        same = all(per_source[name][2] == baseline[name][2] for name in pages)
+        row = "".join(f"{per_source[name][0]:>16.2f}{per_source[name][1]:>16.1f}" for name in pages)
+        print(f"{engine_name:<14}{'таблица' if targeted else 'страница':<10}{row}  {'да' if same else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
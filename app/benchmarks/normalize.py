@@ -0,0 +1,78 @@
+import argparse
+import random
+import re
+import timeit
+from app.parsing.normalize import parse_price, parse_prices
+# python -m app.benchmarks.normalize
+
+
+def legacy_chain(text: str) -> float:
+    """
+    Прежняя цепочка для цены VBR: очистка в парсере, clean_price
+    в процессоре и preprocess_prices перед записью в БД.
+    """
+    price = text.replace(' $', '').strip()
+    price = re.sub(r'\.(?=.*\.)', '', price.replace(',', '.'))
+    return float(price.replace(" ", ""))
+
+
+def format_price(value: float, decimals: int, style: str) -> str:
+    """
+    Печатает число так, как его показывают сайты: с группировкой тысяч,
+    NBSP, дробной запятой и символом валюты.
+    """
+    text = f"{value:,.{decimals}f}"
+    if style == "en":
+        return random.choice(["{}", "${}", "{} USD", "$ {}"]).format(text)
+    grouping = random.choice([" ", " ", " ", "."])
+    text = text.replace(",", "\0").replace(".", ",").replace("\0", grouping)
+    return random.choice(["{}", "{} $", "{} ₽", "{} USD"]).format(text)
+
+
+def check_properties(samples: int) -> int:
+    """
+    Свойство: для любого числа и любого оформления в стиле формата
+    parse_price возвращает то же число, что было напечатано.
+    Возвращает количество нарушений (и печатает первые из них).
+    """
+    failures = 0
+    for _ in range(samples):
+        style = random.choice(["ru", "en"])
+        decimals = random.randint(0, 8)
+        value = round(random.uniform(0, 10 ** random.randint(0, 9)), decimals)
+        text = format_price(value, decimals, style)
+        parsed = parse_price(text, style)
+        if parsed != float(f"{value:.{decimals}f}"):
+            failures += 1
+            if failures <= 10:
+                print(f"  {style} {text!r}: {parsed} != {value}")
+    return failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Проверка и микробенчмарк нормализатора цен")
+    arg_parser.add_argument("--samples", type=int, default=100_000)
+    arg_parser.add_argument("--rows", type=int, default=1_000)
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    failures = check_properties(args.samples)
+    print(f"Свойства: {args.samples} примеров, нарушений: {failures}")
+    if failures:
+        # Те же свойства проверяет tests/test_normalize.py
+        raise SystemExit(1)
+
+    texts = [f"{random.uniform(0, 100_000):,.2f}".replace(",", " ").replace(".", ",") + " $" for _ in range(args.rows)]
+    batch = dict(enumerate(texts))
+    legacy = timeit.timeit(lambda: [legacy_chain(text) for text in texts], number=args.repeat)
+    single = timeit.timeit(lambda: [parse_price(text) for text in texts], number=args.repeat)
+    batched = timeit.timeit(lambda: parse_prices(batch), number=args.repeat)
+
+    per_row = 1_000_000 / (args.rows * args.repeat)
+    print(f"прежняя цепочка: {legacy * per_row:.2f} мкс/строка")
+    print(f"parse_price:     {single * per_row:.2f} мкс/строка")
+    print(f"parse_prices:    {batched * per_row:.2f} мкс/строка")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+from app.parsing import parsing
+from app.parsing.parsing import CryptoScraper, CryptoDataProcessor
+from app.parsing.replay import ReplayServer
+# python -m app.benchmarks.scraper fixtures/ --cycles 50 --latency 0.2 --jitter 0.05
+
+
+def timed_parse(scraper: CryptoScraper, parse_times: dict):
+    """
+    Оборачивает scraper.parse_source, чтобы копить время разбора по источникам.
+    """
+    parse_source = scraper.parse_source
+
+    def wrapper(source, html):
+        started = time.perf_counter()
+        try:
+            return parse_source(source, html)
+        finally:
+            parse_times[source.name].append(time.perf_counter() - started)
+
+    scraper.parse_source = wrapper
+
+
+def run_cycles(server: ReplayServer, mode: str, cycles: int, engine: str, targeted: bool) -> dict:
+    """
+    Прогоняет cycles полных циклов get_crypto_prices против локального
+    сервера с фикстурами и собирает пропускную способность, время разбора
+    по источникам и пик памяти Python-кучи за цикл.
+    """
+    parsing.SCRAPER_MODE = mode
+    scraper = CryptoScraper(engine=engine, targeted=targeted, sources=server.sources())
+    processor = CryptoDataProcessor(scraper)
+    parse_times = defaultdict(list)
+    timed_parse(scraper, parse_times)
+
+    processor.get_crypto_prices()  # прогрев: соединения, импорт движка
+
+    peaks = []
+    started = time.perf_counter()
+    for _ in range(cycles):
+        tracemalloc.start()
+        processor.get_crypto_prices()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    elapsed = time.perf_counter() - started
+    pipeline = scraper.parse_pool.report() if scraper.parse_pool is not None else None
+    scraper.close()
+
+    return {
+        "cycles_per_sec": cycles / elapsed,
+        "cycle_ms": elapsed * 1000 / cycles,
+        "parse_ms": {name: 1000 * sum(times) / len(times) for name, times in parse_times.items()},
+        "peak_kb": max(peaks) / 1024,
+        "stats": scraper.stats,
+        "pipeline": pipeline,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк цикла парсинга на записанных фикстурах")
+    arg_parser.add_argument("directory")
+    arg_parser.add_argument("--cycles", type=int, default=20)
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--jitter", type=float, default=0.0)
+    arg_parser.add_argument("--engine", default=None)
+    arg_parser.add_argument("--targeted", action="store_true")
+    arg_parser.add_argument("--modes", default="sync,async")
+    args = arg_parser.parse_args()
+
+    # Печать итоговых данных в каждом цикле мешает замерам
+    parsing.print = lambda *a, **k: None
+
+    with ReplayServer(args.directory, args.latency, args.jitter) as server:
+        for mode in args.modes.split(","):
+            result = run_cycles(server, mode, args.cycles, args.engine, args.targeted)
+            parse = ", ".join(f"{name} {ms:.2f}" for name, ms in result["parse_ms"].items()) or "в пуле процессов"
+            print(
+                f"{mode:<6} циклов/с {result['cycles_per_sec']:8.2f}  цикл {result['cycle_ms']:8.1f} мс  "
+                f"память {result['peak_kb']:8.1f} КБ  разбор, мс: {parse}"
+            )
+            if result["pipeline"]:
+                print(f"       конвейер: {result['pipeline']}")
+
+
+if __name__ == "__main__":
+    main()
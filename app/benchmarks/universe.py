@@ -0,0 +1,94 @@
+import argparse
+import dataclasses
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from app.parsing import parsing
+from app.parsing.parsing import CryptoScraper, CryptoDataProcessor
+from app.parsing.replay import ReplayServer, fixture_name
+from app.parsing.sources import SOURCES, SOURCES_BY_NAME
+# python -m app.benchmarks.universe --sizes 100,1000,5000 --page-size 100
+
+
+def synthetic_rows(name: str, symbols: list) -> str:
+    """
+    Строки таблицы в разметке встроенных источников (vbr, investing, bitinfo).
+    """
+    if name == "vbr":
+        return "".join(f"<tr><td><span>{s}</span></td><td></td><td><div>{i + 1} 000,{i % 100:02d} $</div></td></tr>" for i, s in enumerate(symbols))
+    if name == "investing":
+        return "".join(f"<tr><td></td><td></td><td>{s}</td><td><span>{i + 1}.000,{i % 100:02d}</span></td></tr>" for i, s in enumerate(symbols))
+    return "".join(f"<tr><td>{s} Coin</td><td><a>${i + 1},000.{i % 100:02d} USD</a></td></tr>" for i, s in enumerate(symbols))
+
+
+def synthetic_page(name: str, symbols: list) -> str:
+    table = f"<table><thead><tr><th></th></tr></thead><tbody>{synthetic_rows(name, symbols)}</tbody></table>"
+    if name == "investing":
+        # Таблица investing лежит по пути div:nth-of-type(5) > div > div:nth-of-type(2) > div:nth-of-type(1)
+        table = "<div></div>" * 4 + f"<div><div><div></div><div><div>{table}</div></div></div></div>"
+    return f"<html><head><title>{name}</title></head><body><nav>{'<a>menu</a>' * 50}</nav>{table}</body></html>"
+
+
+def write_listing(directory: Path, size: int, page_size: int) -> int:
+    """
+    Пишет постраничные листинги всех встроенных источников на size тикеров:
+    имена страниц — как у записанных фикстур (app.parsing.replay.fixture_name).
+    """
+    symbols = [f"C{i:05d}" for i in range(size)]
+    pages = [symbols[i:i + page_size] for i in range(0, size, page_size)]
+    for name in SOURCES_BY_NAME:
+        for number, chunk in enumerate(pages, start=1):
+            (directory / f"{fixture_name(name, number)}.html").write_text(synthetic_page(name, chunk), encoding="utf-8")
+    return len(pages)
+
+
+def measure(size: int, page_size: int, cycles: int, mode: str) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        pages = write_listing(Path(directory), size, page_size)
+        with ReplayServer(directory) as server:
+            # Встроенные источники — одностраничные; делаем их постраничными, а адреса
+            # страниц на локальный сервер подставляет server.sources(), как для записанных фикстур
+            sources = server.sources([
+                dataclasses.replace(source, page_url=f"{source.url}?page={{page}}", pages=pages)
+                for source in SOURCES
+            ])
+            scraper = CryptoScraper(sources=sources)
+            processor = CryptoDataProcessor(scraper)
+            processor.get_crypto_prices()  # прогрев
+
+            peak = 0
+            started = time.perf_counter()
+            for _ in range(cycles):
+                tracemalloc.start()
+                rows = processor.get_crypto_prices()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            elapsed = time.perf_counter() - started
+            scraper.close()
+    return {"pages": pages, "rows": len(rows), "cycle_ms": elapsed * 1000 / cycles, "peak_kb": peak / 1024}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Время и память цикла в зависимости от размера вселенной валют")
+    arg_parser.add_argument("--sizes", default="100,1000,5000")
+    arg_parser.add_argument("--page-size", type=int, default=100)
+    arg_parser.add_argument("--cycles", type=int, default=5)
+    arg_parser.add_argument("--mode", default="async")
+    args = arg_parser.parse_args()
+
+    parsing.print = lambda *a, **k: None
+    parsing.SCRAPER_MODE = args.mode
+    parsing.TRACKED_SYMBOLS = None  # "all"
+
+    print(f"{'тикеров':>8}{'страниц':>9}{'строк':>8}{'цикл, мс':>11}{'мс/тикер':>10}{'память, КБ':>12}{'КБ/тикер':>10}")
+    for size in map(int, args.sizes.split(",")):
+        result = measure(size, args.page_size, args.cycles, args.mode)
+        print(
+            f"{size:>8}{result['pages']:>9}{result['rows']:>8}{result['cycle_ms']:>11.1f}"
+            f"{result['cycle_ms'] / size:>10.3f}{result['peak_kb']:>12.1f}{result['peak_kb'] / size:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import time
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from app.db.session import make_engine, Base, Source, Price, PriceTick, PriceOhlc1m, PriceOhlc1h, PriceOhlc1d
+from app.parsing.pars_in_db import DatabaseManager
+from app.parsing.sources import SOURCES
+# python -m app.benchmarks.upsert --sizes 10,1000,10000
+# Нужен доступный PostgreSQL (POSTGRES_* из .env). Таблицы создаются во временной схеме,
+# которая удаляется после замера — рабочие данные не затрагиваются.
+# Путь upsert — полный путь записи воркера: prices, история price_ticks и свечи OHLC.
+
+# Таблицы, которые трогает DatabaseManager.write_ticks
+TABLES = (Source, Price, PriceTick, PriceOhlc1m, PriceOhlc1h, PriceOhlc1d)
+
+SCHEMA = "bench_upsert"
+
+
+def legacy_import(session_factory, data: list):
+    """
+    Прежний путь: SELECT ... first() и UPDATE/INSERT на каждую валюту и источник
+    (без записи истории в price_ticks).
+    """
+    db = session_factory()
+    try:
+        manager = DatabaseManager()
+        sources = manager.source_ids(db)
+        for item in data:
+            for name, source_id in sources.items():
+                key = f"{name}_price"
+                record = db.query(Price).filter(Price.source_id == source_id, Price.currency == item["currency"]).first()
+                if record:
+                    record.price = item[key]
+                    record.timestamp = datetime.utcnow()
+                else:
+                    db.add(Price(source_id=source_id, currency=item["currency"], price=item[key], timestamp=datetime.utcnow()))
+        db.commit()
+    finally:
+        db.close()
+
+
+def synthetic_data(size: int, shift: float = 0.0) -> list:
+    return [
+        {"currency": f"C{i:05d}", **{f"{source.name}_price": i + 1 + shift for source in SOURCES}}
+        for i in range(size)
+    ]
+
+
+def measure(run, session_factory, engine, size: int) -> dict:
+    """
+    Строк в секунду на вставку (пустые таблицы) и на обновление (все валюты уже есть).
+    """
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE prices, price_ticks, price_ohlc_1m, price_ohlc_1h, price_ohlc_1d"))
+    rows = size * len(SOURCES)
+    result = {}
+    for phase, shift in (("insert", 0.0), ("update", 0.5)):
+        data = synthetic_data(size, shift)
+        started = time.perf_counter()
+        run(session_factory, data)
+        result[phase] = rows / (time.perf_counter() - started)
+    return result
+
+
+def bulk_import(session_factory, data: list):
+    manager = DatabaseManager()
+    manager.session_factory = session_factory
+    manager.import_data_to_db(data)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Скорость записи цен в БД: построчно и INSERT ... ON CONFLICT")
+    arg_parser.add_argument("--sizes", default="10,1000,10000")
+    arg_parser.add_argument("--legacy-max", type=int, default=1000, help="построчный путь только до этого размера")
+    args = arg_parser.parse_args()
+
+    engine = make_engine("cli", connect_args={"options": f"-csearch_path={SCHEMA}"})
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+    # Секции price_ticks и price_ohlc_1m досоздаёт сам write_ticks — в схеме бенчмарка через search_path
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in TABLES])
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"{'валют':>7}{'путь':>8}{'вставка, строк/с':>18}{'обновление, строк/с':>21}")
+    try:
+        for size in map(int, args.sizes.split(",")):
+            runs = [("upsert", bulk_import)]
+            if size <= args.legacy_max:
+                runs.insert(0, ("legacy", legacy_import))
+            for label, run in runs:
+                result = measure(run, session_factory, engine, size)
+                print(f"{size:>7}{label:>8}{result['insert']:>18.0f}{result['update']:>21.0f}")
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
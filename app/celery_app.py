@@ -1,5 +1,9 @@
+import os
 from celery import Celery
 
+# Настройки пула БД для воркера (см. app/db/config.py); выставляем до импорта задач
+os.environ.setdefault("APP_ROLE", "worker")
+
 celery_app = Celery(
     "app",
     broker="redis://127.0.0.1:6379/0",
@@ -12,6 +16,24 @@ celery_app.conf.beat_schedule = {
     "update-crypto-prices-every-5-minutes": {
         "task": "app.parsing.tasks.update_crypto_prices",
         "schedule": 120.0,  # здесь меняю время обновления
+        # Не копим запуски в очереди: если воркер не взял задачу до следующего тика, она устаревает
+        "options": {"expires": 120.0},
+    },
+    # Хранение истории: удаление секций тиков и минутных свечей старше RETENTION_*_DAYS
+    "enforce-price-retention-daily": {
+        "task": "app.parsing.tasks.enforce_price_retention",
+        "schedule": 86400.0,
+    },
+    # Сброс буфера тиков по времени (TICK_FLUSH_INTERVAL) и досылка спула после сбоя БД
+    "flush-tick-buffer-every-minute": {
+        "task": "app.parsing.tasks.flush_tick_buffer",
+        "schedule": 60.0,
+        "options": {"expires": 60.0},
+    },
+    # Секции истории цен создаются заранее; раз в сутки продлеваем запас
+    "ensure-tick-partitions-daily": {
+        "task": "app.parsing.tasks.ensure_tick_partitions",
+        "schedule": 86400.0,
     },
 }
 
@@ -0,0 +1,30 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.db.config import ASYNC_DATABASE_URL, APP_ROLE, pool_settings
+from app.db.metrics import InstrumentedAsyncPool, set_capacity
+
+
+def make_async_engine(role: str = APP_ROLE, url: str = ASYNC_DATABASE_URL):
+    """
+    Асинхронный двойник make_engine из app/db/session.py (asyncpg): те же настройки пула роли,
+    statement_timeout передаётся серверу при подключении.
+    """
+    settings = pool_settings(role)
+    server_settings = {}
+    if settings["statement_timeout_ms"]:
+        server_settings["statement_timeout"] = str(settings["statement_timeout_ms"])
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        connect_args={"server_settings": server_settings},
+    )
+    return set_capacity(engine, settings)
+
+
+# Один асинхронный движок на процесс API
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
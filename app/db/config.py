@@ -8,3 +8,39 @@ POSTGRES_USER = os.getenv('POSTGRES_USER')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/crypto"
+
+# Тип процесса: "api" (uvicorn), "worker" (Celery, выставляет app/celery_app.py) или "cli".
+# От него зависят настройки пула по умолчанию — API держит больше соединений и короткий таймаут
+# запроса, воркеру хватает пары соединений, но его пакетные записи дольше
+APP_ROLE = os.getenv("APP_ROLE", "api")
+
+# Порт, на котором воркер отдаёт метрики пула в формате Prometheus (GET /metrics); 0 — не отдавать.
+# У API метрики на его собственном /metrics
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9101))
+
+POOL_DEFAULTS = {
+    "api": {"pool_size": 10, "max_overflow": 10, "statement_timeout_ms": 5000},
+    "worker": {"pool_size": 2, "max_overflow": 2, "statement_timeout_ms": 60000},
+    "cli": {"pool_size": 1, "max_overflow": 1, "statement_timeout_ms": 0},
+}
+
+
+def pool_settings(role: str = APP_ROLE) -> dict:
+    """
+    Настройки пула для роли; любая из них переопределяется переменной DB_<ИМЯ>,
+    например DB_POOL_SIZE=20 или DB_STATEMENT_TIMEOUT_MS=0 (без таймаута).
+    """
+    defaults = POOL_DEFAULTS.get(role, POOL_DEFAULTS["api"])
+    settings = {
+        **defaults,
+        "pool_timeout": 10,  # сколько ждать свободного соединения, секунды
+        "pool_recycle": 1800,  # пересоздавать соединения старше, секунды
+        "pool_pre_ping": 1,
+    }
+    for name, value in settings.items():
+        settings[name] = int(os.getenv(f"DB_{name.upper()}", value))
+    settings["pool_pre_ping"] = bool(settings["pool_pre_ping"])
+    return settings
+
+# Тот же сервер для асинхронного движка (драйвер asyncpg)
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
@@ -0,0 +1,160 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Границы гистограммы ожидания соединения, секунды
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """
+    Ожидание соединения из пула (гистограмма), таймауты и насыщение пула.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.capacity = 0  # pool_size + max_overflow из настроек роли, см. set_capacity
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self.lock:
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            self.checkouts += 1
+            self.timeouts += timed_out
+
+
+class PoolTimingMixin:
+    """
+    Замеряет, сколько вызывающий ждал соединения из пула.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # После dispose() пул пересоздаётся — метрики переносим в новый
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(PoolTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(PoolTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def set_capacity(engine, settings: dict):
+    """
+    Запоминает ёмкость пула (pool_size + max_overflow из pool_settings роли) для метрик
+    насыщения — без обращения к внутренним полям пула SQLAlchemy.
+    """
+    engine.pool.metrics.capacity = settings["pool_size"] + settings["max_overflow"]
+    return engine
+
+
+def pool_stats(engine) -> dict:
+    """
+    Снимок состояния пула для логов воркера.
+    """
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    capacity = metrics.capacity if metrics is not None else pool.size()
+    stats = {
+        "checked_out": pool.checkedout(),
+        "capacity": capacity,
+        "saturation": round(pool.checkedout() / capacity, 3) if capacity > 0 else 0.0,
+    }
+    if metrics is not None:
+        stats.update({
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "avg_wait_ms": round(metrics.wait_sum * 1000 / metrics.checkouts, 3) if metrics.checkouts else 0.0,
+        })
+    return stats
+
+
+def render_prometheus(engines: dict, role: str) -> str:
+    """
+    Метрики пулов в текстовом формате Prometheus; engines — {метка pool: движок}.
+    """
+    series = {"wait": [], "timeouts": [], "checked_out": [], "capacity": [], "saturation": []}
+    for name, engine in engines.items():
+        pool = engine.pool
+        metrics = pool.metrics
+        labels = f'role="{role}",pool="{name}"'
+        capacity = metrics.capacity
+        with metrics.lock:
+            cumulative = 0
+            for bound, count in zip((*WAIT_BUCKETS, "+Inf"), metrics.buckets):
+                cumulative += count
+                series["wait"].append(f'db_pool_checkout_wait_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            series["wait"].append(f"db_pool_checkout_wait_seconds_sum{{{labels}}} {metrics.wait_sum}")
+            series["wait"].append(f"db_pool_checkout_wait_seconds_count{{{labels}}} {metrics.checkouts}")
+            series["timeouts"].append(f"db_pool_checkout_timeouts_total{{{labels}}} {metrics.timeouts}")
+        series["checked_out"].append(f"db_pool_checked_out{{{labels}}} {pool.checkedout()}")
+        series["capacity"].append(f"db_pool_capacity{{{labels}}} {capacity}")
+        series["saturation"].append(f"db_pool_saturation{{{labels}}} {pool.checkedout() / capacity if capacity > 0 else 0.0}")
+
+    lines = [
+        "# HELP db_pool_checkout_wait_seconds Ожидание соединения из пула",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+        *series["wait"],
+        "# HELP db_pool_checkout_timeouts_total Соединение не дождались за pool_timeout",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+        *series["timeouts"],
+        "# HELP db_pool_checked_out Соединений выдано сейчас",
+        "# TYPE db_pool_checked_out gauge",
+        *series["checked_out"],
+        "# HELP db_pool_capacity Размер пула вместе с overflow",
+        "# TYPE db_pool_capacity gauge",
+        *series["capacity"],
+        "# HELP db_pool_saturation Доля занятых соединений от capacity",
+        "# TYPE db_pool_saturation gauge",
+        *series["saturation"],
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(engines: dict, role: str, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Отдаёт render_prometheus(engines, role) на http://host:port/metrics в фоновом потоке —
+    для процессов без своего HTTP-сервера (воркер Celery).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(engines, role).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # скрейп каждые несколько секунд не засоряет лог воркера
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="db-metrics", daemon=True).start()
+    return server
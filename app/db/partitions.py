@@ -0,0 +1,122 @@
+import os
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+import dotenv
+
+dotenv.load_dotenv()
+
+# На сколько интервалов вперёд держать готовые секции (дней для дневных, месяцев для месячных)
+TICK_PARTITIONS_AHEAD = int(os.getenv("TICK_PARTITIONS_AHEAD", 7))
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+class PartitionManager:
+    """
+    Создаёт секции RANGE по времени для секционированной таблицы заранее,
+    чтобы вставка никогда не упиралась в отсутствующую секцию.
+    interval — "day" (секция <таблица>_pYYYYMMDD) или "month" (<таблица>_pYYYYMM).
+    """
+    def __init__(self, table: str, interval: str = "day", ahead: int = TICK_PARTITIONS_AHEAD):
+        if interval not in ("day", "month"):
+            raise ValueError(f"Неизвестный интервал секций: {interval}")
+        self.table = table
+        self.interval = interval
+        self.ahead = ahead
+        # До какой даты (не включительно) секции уже точно есть — в пределах процесса
+        self.ready_until = None
+
+    def bounds(self, day: date) -> tuple:
+        """
+        Границы секции, в которую попадает day: [начало, конец).
+        """
+        if self.interval == "day":
+            return day, day + timedelta(days=1)
+        return month_start(day), next_month(day)
+
+    def partition_name(self, day: date) -> str:
+        start, _ = self.bounds(day)
+        suffix = start.strftime("%Y%m%d" if self.interval == "day" else "%Y%m")
+        return f"{self.table}_p{suffix}"
+
+    def ranges(self, start: date, end: date):
+        """
+        Все секции, пересекающие [start, end].
+        """
+        day = self.bounds(start)[0]
+        while day <= end:
+            lower, upper = self.bounds(day)
+            yield self.partition_name(day), lower, upper
+            day = upper
+
+    def existing(self, connection) -> list:
+        """
+        Секции таблицы, созданные этим менеджером: [(имя, начало, конец)] по возрастанию.
+        """
+        names = connection.execute(
+            text("""
+                SELECT c.relname FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:table AS regclass)
+            """),
+            {"table": self.table},
+        ).scalars()
+        prefix = f"{self.table}_p"
+        pattern = "%Y%m%d" if self.interval == "day" else "%Y%m"
+        partitions = []
+        for name in names:
+            try:
+                day = datetime.strptime(name[len(prefix):], pattern).date() if name.startswith(prefix) else None
+            except ValueError:
+                day = None
+            if day is not None:
+                partitions.append((name, *self.bounds(day)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def create(self, connection, start: date, end: date) -> list:
+        """
+        Создаёт недостающие секции на [start, end]. Возвращает имена созданных.
+        """
+        # Воркеры могут досоздавать секции одновременно — сериализуем по имени таблицы
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": self.table})
+        existing = {name for name, _, _ in self.existing(connection)}
+        created = []
+        for name, lower, upper in self.ranges(start, end):
+            if name in existing:
+                continue
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            created.append(name)
+        return created
+
+    def ensure(self, connection, now: datetime = None) -> list:
+        """
+        Гарантирует секции от текущей до now + ahead интервалов.
+        Пока запас не исчерпан, запросов к БД не делает — можно звать перед каждой вставкой.
+        """
+        today = (now or datetime.utcnow()).date()
+        # Досоздаём, когда до края подготовленных секций осталось меньше половины запаса
+        if self.ready_until is not None and today + self.margin() < self.ready_until:
+            return []
+        horizon = today
+        for _ in range(self.ahead):
+            horizon = self.bounds(horizon)[1]
+        created = self.create(connection, today, horizon)
+        self.ready_until = self.bounds(horizon)[1]
+        return created
+
+    def margin(self) -> timedelta:
+        days = 1 if self.interval == "day" else 31
+        return timedelta(days=days * max(self.ahead // 2, 1))
+
+
+# Секции истории тиков (таблица price_ticks)
+TICK_PARTITIONS = PartitionManager("price_ticks", "day")
@@ -1,57 +1,48 @@
-from sqlalchemy import Column, String, Float, Integer, create_engine, DateTime, func
-from sqlalchemy.orm import declarative_base, sessionmaker
-import dotenv, os
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
 from passlib.context import CryptContext  # Для хеширования пароля
-
-dotenv.load_dotenv()
-
-# Подключение к PostgreSQL
-POSTGRES_HOST = os.getenv('POSTGRES_HOST')
-POSTGRES_USER = os.getenv('POSTGRES_USER')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
-
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/crypto"
-
-# Создание базы данных и сессии
-engine = create_engine(DATABASE_URL)
+from app.db.config import DATABASE_URL, APP_ROLE, pool_settings
+from app.db.metrics import InstrumentedQueuePool, set_capacity
+from app.models.models import Base, User, Source, Price, PriceTick, PriceOhlc1m, PriceOhlc1h, PriceOhlc1d, BackfillProgress  # Модели описаны один раз, здесь — реэкспорт
+
+
+def make_engine(role: str = APP_ROLE, url: str = DATABASE_URL, connect_args: dict = None):
+    """
+    Единственное место, где создаётся движок: пул с настройками роли процесса
+    (см. app/db/config.py), pre-ping, пересоздание старых соединений и statement_timeout
+    на уровне соединения. Ожидание соединения из пула замеряется (app/db/metrics.py).
+    """
+    settings = pool_settings(role)
+    connect_args = dict(connect_args or {})
+    if settings["statement_timeout_ms"]:
+        options = connect_args.get("options", "")
+        connect_args["options"] = f"{options} -c statement_timeout={settings['statement_timeout_ms']}".strip()
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+    return set_capacity(engine, settings)
+
+
+def without_statement_timeout(connection):
+    """
+    Снимает statement_timeout до конца текущей транзакции — для COPY, пересчёта свечей и DDL.
+    """
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+# Один движок и фабрика сессий на процесс
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-# Модель для пользователя
-class User(Base):
-    __tablename__ = "users"
-
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, index=True, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-
-# Модели для таблиц цен с разных сайтов
-class VBRPrice(Base):
-    __tablename__ = "vbr_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
-    price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
-
-class InvestingPrice(Base):
-    __tablename__ = "investing_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
-    price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
-
-class BitInfoPrice(Base):
-    __tablename__ = "bitinfo_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
-    price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
 
 # Хеширование пароля
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
-
-
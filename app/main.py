@@ -28,10 +28,17 @@
 # def root():
 #     return {"message": "API is running 🚀"}
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.models import models
-from app.models.database import engine
+from app.api.snapshot import price_snapshot
+from app.service.pubsub import get_pubsub
+from app.db.async_session import async_engine
+from app.db.config import APP_ROLE
+from app.db.metrics import render_prometheus
+from fastapi.responses import PlainTextResponse
 from app.api.routes import router  # uvicorn app.main:app --reload
 import subprocess
 import logging
@@ -50,8 +57,15 @@ def run_migrations():
         logger.error(f"Ошибка при выполнении миграций: {e}")
         raise
 
+# Подписка на срезы последних цен от воркера на всё время работы процесса
+@asynccontextmanager
+async def lifespan(app):
+    listener = asyncio.create_task(price_snapshot.listen(get_pubsub()))
+    yield
+    listener.cancel()
+
 # Создание экземпляра FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Разрешаем запросы с любого источника
 app.add_middleware(
@@ -70,6 +84,12 @@ app.include_router(router)
 def root():
     return {"message": "API is running 🚀"}
 
+# Метрики пула соединений с БД для Prometheus. Все маршруты API работают через
+# асинхронный движок — синхронный пул в процессе API соединений не открывает
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_prometheus({"async": async_engine}, APP_ROLE)
+
 # Запуск миграций только при старте через `uvicorn main:app`
 if __name__ == "__main__":
     run_migrations()
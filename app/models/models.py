@@ -1,28 +1,95 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base  # Импортируем Base из database.py
 
 # Модели таблиц
-class VBRPrice(Base):
-    __tablename__ = "vbr_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
-    price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
+# Справочник источников (строки соответствуют SourceSpec.name из реестра app/parsing/sources.py)
+class Source(Base):
+    __tablename__ = "sources"
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    title = Column(String, nullable=False)
 
-class InvestingPrice(Base):
-    __tablename__ = "investing_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
+# Последняя цена каждой валюты в каждом источнике: одна строка на (source_id, currency)
+class Price(Base):
+    __tablename__ = "prices"
+    __table_args__ = (
+        UniqueConstraint("source_id", "currency", name="uq_prices_source_currency"),
+        # Чтения по валюте сразу во всех источниках — один проход по индексу
+        Index("ix_prices_currency", "currency"),
+    )
+    id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), nullable=False)
+    currency = Column(String, nullable=False)
     price = Column(Float, nullable=False)
     timestamp = Column(DateTime, default=func.now(), nullable=False)
 
-class BitInfoPrice(Base):
-    __tablename__ = "bitinfo_prices"
-    id = Column(Integer, primary_key=True, index=True)
-    currency = Column(String, index=True, nullable=False)
+    source = relationship(Source)
+
+# Append-only история цен. Таблица секционирована по дням (PARTITION BY RANGE (timestamp)),
+# секции создаёт приложение заранее — см. app/db/partitions.py
+class PriceTick(Base):
+    __tablename__ = "price_ticks"
+    __table_args__ = (
+        Index("ix_price_ticks_timestamp_brin", "timestamp", postgresql_using="brin"),
+        Index("ix_price_ticks_currency_timestamp", "currency", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    # Ключ секционирования обязан входить в первичный ключ
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, primary_key=True, default=func.now(), nullable=False)
+    source = Column(String, nullable=False)
+    currency = Column(String, nullable=False)
     price = Column(Float, nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
+
+# Свечи OHLC по тикам: обновляются при каждой записи тиков (app/parsing/rollups.py).
+# first_ts/last_ts — время первого и последнего тика в свече, по ним open/close
+# корректно сливаются, даже если тики приходят не по порядку
+class OhlcColumns:
+    currency = Column(String, primary_key=True)
+    source = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+    first_ts = Column(DateTime, nullable=False)
+    last_ts = Column(DateTime, nullable=False)
+    # Среднее и сумма квадратов отклонений (Уэлфорд) — для среднего и стандартного отклонения за окно
+    mean = Column(Float, nullable=False)
+    m2 = Column(Float, nullable=False)
+
+# Минутные свечи секционированы по месяцам, как и тики — по дням
+# Индекс (currency, bucket) ограничивает окно статистики по времени для всех источников сразу:
+# первичный ключ (currency, source, bucket) по bucket без source не сужается
+class PriceOhlc1m(OhlcColumns, Base):
+    __tablename__ = "price_ohlc_1m"
+    __table_args__ = (
+        Index("ix_price_ohlc_1m_currency_bucket", "currency", "bucket"),
+        {"postgresql_partition_by": "RANGE (bucket)"},
+    )
+
+class PriceOhlc1h(OhlcColumns, Base):
+    __tablename__ = "price_ohlc_1h"
+    __table_args__ = (Index("ix_price_ohlc_1h_currency_bucket", "currency", "bucket"),)
+
+class PriceOhlc1d(OhlcColumns, Base):
+    __tablename__ = "price_ohlc_1d"
+    __table_args__ = (Index("ix_price_ohlc_1d_currency_bucket", "currency", "bucket"),)
+
+# Прогресс загрузки истории (python -m app.parsing.backfill): смещение в файле
+# фиксируется в той же транзакции, что и загруженная пачка
+class BackfillProgress(Base):
+    __tablename__ = "backfill_progress"
+    path = Column(String, primary_key=True)
+    offset = Column(BigInteger, nullable=False)
+    rows = Column(BigInteger, nullable=False)
+    # Диапазон дат всех загруженных пачек, в том числе до прерывания — для пересчёта свечей
+    first_ts = Column(DateTime, nullable=True)
+    last_ts = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), nullable=False)
 
 class User(Base):
     __tablename__ = "users"
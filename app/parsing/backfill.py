@@ -0,0 +1,246 @@
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import time
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+# Запуск из командной строки — пул и таймауты роли cli (см. app/db/config.py); выставляем до импорта app.db
+if __name__ == "__main__":
+    os.environ.setdefault("APP_ROLE", "cli")
+
+from app.db.session import engine, without_statement_timeout, PriceTick, BackfillProgress
+from app.db.partitions import TICK_PARTITIONS
+from app.parsing.normalize import parse_price
+from app.parsing.rollups import rebuild_range
+from app.parsing.sources import SOURCES_BY_NAME
+# python -m app.parsing.backfill history.csv [--format jsonl] [--chunk-rows 500000] [--rebuild-indexes] [--rebuild-rollups]
+
+# Колонки истории: CSV с заголовком или JSONL с такими же ключами
+COLUMNS = ("source", "currency", "price", "timestamp")
+COPY_SQL = f"COPY {PriceTick.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+
+def parse_timestamp(value) -> datetime:
+    """
+    ISO-строка ("2024-01-31T12:00:00Z", "2024-01-31 12:00:00+03:00") или unix-время —
+    числом или строкой ("1706702400", "1706702400.5"; так оно приходит из CSV).
+    Возвращает наивное время в UTC — как в колонке timestamp.
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+        except (OverflowError, OSError) as e:
+            # nan, inf и время за пределами datetime — строка отбраковывается
+            raise ValueError(f"Invalid unix time: {value}") from e
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return moment
+
+
+def normalize_price(value, source: str):
+    """
+    Цена числом или текстом; None, если это не конечное число ("nan", "inf", мусор).
+    """
+    try:
+        price = float(value)
+    except ValueError:
+        # Текст цены как на странице источника: "1 234,56 $"
+        spec = SOURCES_BY_NAME.get(source)
+        price = parse_price(value, spec.number_format if spec else "en")
+    return price if price is not None and math.isfinite(price) else None
+
+
+def read_records(lines: list, file_format: str, header: list):
+    """
+    Записи пачки кортежами в порядке COLUMNS; вместо испорченной строки — None
+    (convert считает её отбракованной, а не обрывает загрузку).
+    """
+    if file_format == "csv":
+        pick = itemgetter(*(header.index(column) for column in COLUMNS))
+        for values in csv.reader(lines):
+            try:
+                yield pick(values)
+            except IndexError:
+                yield None
+    else:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            yield tuple(record.get(column) for column in COLUMNS) if isinstance(record, dict) else None
+
+
+class Backfill:
+    """
+    Потоковая загрузка истории цен в price_ticks через COPY FROM STDIN.
+    Файл читается пачками по chunk_rows строк (одна запись — одна строка файла); каждая
+    пачка — отдельная транзакция, в которой вместе с данными фиксируется смещение в файле
+    (таблица backfill_progress).
+    После прерывания повторный запуск продолжает с первой незагруженной пачки; диапазон
+    загруженных дат тоже хранится в backfill_progress, так что свечи пересчитываются за весь файл.
+    """
+    def __init__(self, path: str, file_format: str = None, chunk_rows: int = 500_000):
+        self.path = os.path.abspath(path)
+        self.file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+        self.chunk_rows = chunk_rows
+        self.stats = {"rows": 0, "rejected": 0, "chunks": 0}
+        # Диапазон загруженных дат (с учётом прежних запусков) — для пересчёта свечей
+        self.first = self.last = None
+
+    def progress(self) -> tuple:
+        """
+        Сохранённый прогресс файла: (смещение, строк загружено, первая дата, последняя дата).
+        """
+        with engine.connect() as connection:
+            row = connection.execute(
+                select(BackfillProgress.offset, BackfillProgress.rows, BackfillProgress.first_ts, BackfillProgress.last_ts)
+                .where(BackfillProgress.path == self.path)
+            ).first()
+        return tuple(row) if row else (0, 0, None, None)
+
+    def reset(self):
+        with engine.begin() as connection:
+            connection.execute(delete(BackfillProgress).where(BackfillProgress.path == self.path))
+
+    def convert(self, records) -> tuple:
+        """
+        Пачка записей -> CSV-буфер для COPY, число строк в нём и диапазон дат (для секций).
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        first = last = None
+        for record in records:
+            try:
+                source, currency, price, moment = record
+                price = normalize_price(price, source)
+                moment = parse_timestamp(moment)
+                currency = str(currency).upper() if currency else None
+            except (TypeError, ValueError):
+                price = None
+            if price is None or not source or not currency:
+                self.stats["rejected"] += 1
+                continue
+            writer.writerow((source, currency, repr(price), moment.isoformat(sep=" ")))
+            count += 1
+            first = moment if first is None or moment < first else first
+            last = moment if last is None or moment > last else last
+        buffer.seek(0)
+        return buffer, count, first, last
+
+    def load_chunk(self, lines: list, header: list, offset: int, total: int) -> int:
+        buffer, loaded, first, last = self.convert(read_records(lines, self.file_format, header))
+        if loaded:
+            self.first = min(self.first or first, first)
+            self.last = max(self.last or last, last)
+        with engine.begin() as connection:
+            without_statement_timeout(connection)
+            if loaded:
+                TICK_PARTITIONS.create(connection, first.date(), last.date())
+                connection.connection.cursor().copy_expert(COPY_SQL, buffer)
+            statement = insert(BackfillProgress).values(
+                path=self.path, offset=offset, rows=total + loaded,
+                first_ts=self.first, last_ts=self.last, updated_at=datetime.utcnow(),
+            )
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[BackfillProgress.path],
+                set_={column: statement.excluded[column] for column in ("offset", "rows", "first_ts", "last_ts", "updated_at")},
+            ))
+        return loaded
+
+    def run(self):
+        # Диапазон дат продолжается с сохранённого: --rebuild-rollups после возобновлённой
+        # загрузки пересчитает свечи и за пачки, загруженные до прерывания
+        offset, total, self.first, self.last = self.progress()
+        if offset:
+            print(f"↩️ Продолжаем {self.path} с байта {offset}, уже загружено {total} строк")
+        started = time.perf_counter()
+        with open(self.path, "rb") as source_file:
+            header = None
+            if self.file_format == "csv":
+                header = next(csv.reader([source_file.readline().decode()]))
+                missing = set(COLUMNS) - set(header)
+                if missing:
+                    raise ValueError(f"В заголовке CSV нет колонок: {', '.join(sorted(missing))}")
+            if offset:
+                source_file.seek(offset)
+            while True:
+                lines = []
+                for _ in range(self.chunk_rows):
+                    line = source_file.readline()
+                    if not line:
+                        break
+                    lines.append(line.decode())
+                if not lines:
+                    break
+                loaded = self.load_chunk(lines, header, source_file.tell(), total)
+                total += loaded
+                self.stats["rows"] += loaded
+                self.stats["chunks"] += 1
+                elapsed = time.perf_counter() - started
+                print(f"📦 Пачка {self.stats['chunks']}: всего {total} строк, {self.stats['rows'] / elapsed:.0f} строк/с")
+        self.stats["seconds"] = round(time.perf_counter() - started, 1)
+        return self.stats
+
+
+def drop_indexes():
+    """
+    Снимает вторичные индексы price_ticks (вместе с индексами секций) на время загрузки.
+    """
+    with engine.begin() as connection:
+        for index in PriceTick.__table__.indexes:
+            index.drop(connection, checkfirst=True)
+
+
+def create_indexes():
+    """
+    Строит индексы по описанию модели — так их можно восстановить и после прерванной загрузки.
+    """
+    with engine.begin() as connection:
+        without_statement_timeout(connection)
+        for index in PriceTick.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Загрузка истории цен в price_ticks через COPY")
+    arg_parser.add_argument("path", help="CSV с заголовком source,currency,price,timestamp или JSONL")
+    arg_parser.add_argument("--format", choices=("csv", "jsonl"), help="по умолчанию — по расширению файла")
+    arg_parser.add_argument("--chunk-rows", type=int, default=500_000, help="строк в одной транзакции")
+    arg_parser.add_argument("--rebuild-indexes", action="store_true", help="снять индексы на время загрузки и построить заново")
+    arg_parser.add_argument("--rebuild-rollups", action="store_true", help="пересчитать свечи OHLC за загруженные даты (и до прерывания)")
+    arg_parser.add_argument("--restart", action="store_true", help="забыть сохранённый прогресс и грузить файл с начала")
+    args = arg_parser.parse_args()
+
+    backfill = Backfill(args.path, args.format, args.chunk_rows)
+    if args.restart:
+        backfill.reset()
+    if args.rebuild_indexes:
+        drop_indexes()
+    stats = backfill.run()
+    if args.rebuild_indexes:
+        started = time.perf_counter()
+        create_indexes()
+        print(f"🧱 Индексы построены за {time.perf_counter() - started:.1f} с")
+    if args.rebuild_rollups and backfill.first is not None:
+        rebuild_range(backfill.first.date(), backfill.last.date() + timedelta(days=1))
+    print(f"✅ Загружено: {stats}")
+
+
+if __name__ == "__main__":
+    main()
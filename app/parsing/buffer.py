@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from app.parsing.config import TICK_FLUSH_ROWS, TICK_FLUSH_INTERVAL, TICK_SPOOL_PATH
+from app.parsing.pars_in_db import ticks_from_rows
+
+
+class TickBuffer:
+    """
+    Буфер отложенной записи: копит нормализованные тики и пишет их в БД пачками —
+    по размеру (flush_rows) или по возрасту самого старого тика (flush_interval, секунды).
+    Если БД недоступна, пачка дописывается в спул-файл (JSONL) и досылается
+    перед следующей удачной записью, так что сбой БД не теряет тики.
+    """
+    def __init__(self, db_manager, flush_rows: int = TICK_FLUSH_ROWS,
+                 flush_interval: float = TICK_FLUSH_INTERVAL, spool_path: str = TICK_SPOOL_PATH, last_values=None):
+        self.db_manager = db_manager
+        # LastValueCache: неизменившиеся цены не перезаписывают prices, но попадают в историю и свечи
+        self.last_values = last_values
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.ticks = []
+        self.oldest = None  # time.monotonic() первого тика в буфере
+        self.lock = threading.Lock()
+        self.stats = {"added": 0, "flushes": 0, "written": 0, "spooled": 0, "replayed": 0, "failures": 0}
+
+    def add(self, data: list, timestamp: datetime = None) -> bool:
+        """
+        Кладёт строки парсера в буфер. Возвращает True, если буфер был сброшен.
+        """
+        ticks = ticks_from_rows(data, timestamp or datetime.utcnow())
+        with self.lock:
+            if self.last_values is not None:
+                self.last_values.mark(ticks)
+            if ticks and not self.ticks:
+                self.oldest = time.monotonic()
+            self.ticks.extend(ticks)
+            self.stats["added"] += len(ticks)
+        return self.flush_if_due()
+
+    def due(self) -> bool:
+        if not self.ticks:
+            # Буфер пуст, но после сбоя остался спул — пробуем дослать
+            return os.path.exists(self.spool_path)
+        return len(self.ticks) >= self.flush_rows or time.monotonic() - self.oldest >= self.flush_interval
+
+    def flush_if_due(self) -> bool:
+        if not self.due():
+            return False
+        self.flush()
+        return True
+
+    def flush(self) -> int:
+        """
+        Пишет накопленное в БД (сначала спул, затем буфер). Возвращает число записанных тиков.
+        """
+        with self.lock:
+            ticks, self.ticks, self.oldest = self.ticks, [], None
+            self.stats["flushes"] += 1
+            written = 0
+            try:
+                self.replay_spool()
+                while written < len(ticks):
+                    chunk = ticks[written:written + self.flush_rows]
+                    self.db_manager.write_ticks(chunk)
+                    written += len(chunk)
+                    self.stats["written"] += len(chunk)
+            except Exception as e:
+                self.stats["failures"] += 1
+                # Записанные до сбоя пачки не дублируем, остальное — в спул
+                self.spool(ticks[written:])
+                print(f"💾 БД недоступна ({e}), тики сохранены в {self.spool_path}")
+            return written
+
+    def spool(self, ticks: list):
+        if not ticks:
+            return
+        with open(self.spool_path, "a", encoding="utf-8") as spool_file:
+            for tick in ticks:
+                spool_file.write(json.dumps({**tick, "timestamp": tick["timestamp"].isoformat()}) + "\n")
+        self.stats["spooled"] += len(ticks)
+
+    def replay_spool(self):
+        """
+        Досылает спул пачками по flush_rows. Если запись прервалась, в спуле
+        остаются только незаписанные строки — при следующей попытке ничего не повторится.
+        """
+        if not os.path.exists(self.spool_path):
+            return
+        with open(self.spool_path, encoding="utf-8") as spool_file:
+            lines = spool_file.readlines()
+        done = 0
+        try:
+            while done < len(lines):
+                chunk = [json.loads(line) for line in lines[done:done + self.flush_rows]]
+                for tick in chunk:
+                    tick["timestamp"] = datetime.fromisoformat(tick["timestamp"])
+                self.db_manager.write_ticks(chunk)
+                done += len(chunk)
+                self.stats["replayed"] += len(chunk)
+        except Exception:
+            temporary = f"{self.spool_path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as spool_file:
+                spool_file.writelines(lines[done:])
+            os.replace(temporary, self.spool_path)
+            raise
+        os.remove(self.spool_path)
+
+    def report(self) -> dict:
+        return {**self.stats, "buffered": len(self.ticks)}
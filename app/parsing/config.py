@@ -0,0 +1,96 @@
+import os
+import dotenv
+
+dotenv.load_dotenv()
+
+# Режим работы парсера: "async" — все источники параллельно, "sync" — по очереди
+SCRAPER_MODE = os.getenv("SCRAPER_MODE", "async")
+
+# Таймаут на один источник (секунды), можно переопределить через SCRAPER_TIMEOUT_<ИСТОЧНИК>
+SCRAPER_SOURCE_TIMEOUT = float(os.getenv("SCRAPER_SOURCE_TIMEOUT", 15))
+
+
+def source_timeout(source: str) -> float:
+    return float(os.getenv(f"SCRAPER_TIMEOUT_{source.upper()}", SCRAPER_SOURCE_TIMEOUT))
+
+# Пул соединений на один хост и время жизни keep-alive соединения (секунды)
+SCRAPER_POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", 4))
+SCRAPER_KEEPALIVE_EXPIRY = float(os.getenv("SCRAPER_KEEPALIVE_EXPIRY", 300))
+
+# Движок разбора HTML: html.parser (BeautifulSoup), lxml или selectolax
+PARSER_ENGINE = os.getenv("PARSER_ENGINE", "html.parser")
+
+# Целевой разбор: строить DOM только для таблицы цен, а не для всей страницы
+PARSER_TARGETED = os.getenv("PARSER_TARGETED", "0") == "1"
+
+# JSON-файл с реестром источников (список SourceSpec); пусто — встроенные источники
+SCRAPER_SOURCES_FILE = os.getenv("SCRAPER_SOURCES_FILE")
+
+# Адаптивный таймаут: p99 задержки источника * SCRAPER_TIMEOUT_FACTOR,
+# но не меньше SCRAPER_MIN_TIMEOUT и не больше таймаута источника (source_timeout)
+SCRAPER_TIMEOUT_FACTOR = float(os.getenv("SCRAPER_TIMEOUT_FACTOR", 2.0))
+SCRAPER_MIN_TIMEOUT = float(os.getenv("SCRAPER_MIN_TIMEOUT", 2))
+SCRAPER_LATENCY_WINDOW = int(os.getenv("SCRAPER_LATENCY_WINDOW", 100))  # последних замеров на источник
+SCRAPER_LATENCY_MIN_SAMPLES = int(os.getenv("SCRAPER_LATENCY_MIN_SAMPLES", 10))  # до этого — фиксированный таймаут
+# Дублирующий запрос, если первый не ответил за p95 (только в async-режиме)
+SCRAPER_HEDGE = os.getenv("SCRAPER_HEDGE", "1") == "1"
+# Предохранитель: после N ошибок подряд источник не опрашивается COOLDOWN секунд
+SCRAPER_BREAKER_FAILURES = int(os.getenv("SCRAPER_BREAKER_FAILURES", 3))
+SCRAPER_BREAKER_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_COOLDOWN", 600))
+# Общий бюджет на цикл опроса: по истечении остаются только ответившие источники
+SCRAPER_CYCLE_DEADLINE = float(os.getenv("SCRAPER_CYCLE_DEADLINE", 60))
+
+
+def load_symbols():
+    """
+    Отслеживаемые валюты в нужном порядке. TRACKED_SYMBOLS — список через
+    запятую или "all" (все, что нашлись в источниках), TRACKED_SYMBOLS_FILE —
+    файл с тикером на строку (для больших списков). None означает "all".
+    Тикеры в верхнем регистре — как в таблице prices.
+    """
+    path = os.getenv("TRACKED_SYMBOLS_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip().upper() for line in f if line.strip()]
+    value = os.getenv("TRACKED_SYMBOLS", "SOL,BTC,LINK,DOGE,ADA,BNB,LTC,ETH,XRP")
+    if value.strip().lower() == "all":
+        return None
+    return [symbol.strip().upper() for symbol in value.split(",") if symbol.strip()]
+
+
+TRACKED_SYMBOLS = load_symbols()
+# В скольких источниках минимум должна быть валюта, чтобы попасть в результат
+MIN_SOURCES_PER_SYMBOL = int(os.getenv("MIN_SOURCES_PER_SYMBOL", 1))
+
+# Конвейер: разбор HTML в пуле процессов, пока идут следующие загрузки (только async-режим).
+# 0 — разбирать в процессе воркера. Пул процессов нельзя создать из prefork-воркера Celery
+# (его процессы демонические), поэтому воркер запускается с --pool=solo или --pool=threads
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", 0))
+# Сколько страниц может ждать разбора одновременно; дальше загрузки ждут (backpressure)
+INGEST_PARSE_QUEUE = int(os.getenv("INGEST_PARSE_QUEUE", 8))
+
+# Запись в БД: сколько строк в одном INSERT ... ON CONFLICT.
+# У PostgreSQL предел 65535 параметров на запрос, на строку уходит 3-4
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 5000))
+
+# Отложенная запись тиков: буфер сбрасывается в БД, когда набралось TICK_FLUSH_ROWS тиков
+# или самому старому больше TICK_FLUSH_INTERVAL секунд. Пока БД недоступна, тики
+# дописываются в спул-файл TICK_SPOOL_PATH и досылаются при следующем удачном сбросе.
+# Буфер свой у каждого процесса воркера — как и пул разбора, рассчитан на --pool=solo/threads
+TICK_FLUSH_ROWS = int(os.getenv("TICK_FLUSH_ROWS", 10000))
+TICK_FLUSH_INTERVAL = float(os.getenv("TICK_FLUSH_INTERVAL", 300))
+TICK_SPOOL_PATH = os.getenv("TICK_SPOOL_PATH", "tick_spool.jsonl")
+
+# Хранение истории: сколько дней держать сырые тики и минутные свечи (0 — хранить всегда).
+# Удаляются целые секции и только если данные покрыты свечами следующего разрешения.
+# Часовые и дневные свечи хранятся всегда — это сотни строк на валюту в год
+RETENTION_TICKS_DAYS = int(os.getenv("RETENTION_TICKS_DAYS", 30))
+RETENTION_OHLC_1M_DAYS = int(os.getenv("RETENTION_OHLC_1M_DAYS", 365))
+
+# Запись только изменившихся цен: строка prices перезаписывается, если цена сдвинулась
+# больше чем на CHANGE_EPSILON (относительно, 0.0001 = 0.01%) или с прошлой записи прошло
+# CHANGE_HEARTBEAT секунд — чтобы timestamp в prices показывал свежесть данных.
+# История price_ticks и свечи получают каждое наблюдение: иначе в минутных свечах
+# были бы пропуски, а среднее и разброс взвешивались бы изменениями цены
+CHANGE_EPSILON = float(os.getenv("CHANGE_EPSILON", 0))
+CHANGE_HEARTBEAT = float(os.getenv("CHANGE_HEARTBEAT", 900))
@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+from bs4 import BeautifulSoup
+
+TABLE_TAG = re.compile(r"<(/?)table\b[^>]*>", re.IGNORECASE)
+
+
+def iter_tables(html: str):
+    """
+    Лениво отдаёт куски html с таблицами верхнего уровня (<table>...</table>),
+    учитывая вложенные таблицы. Сканирование идёт только до конца текущей
+    таблицы, поэтому если потребитель остановился, остаток страницы не читается.
+    """
+    depth = 0
+    start = None
+    for match in TABLE_TAG.finditer(html):
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                yield html[start:match.end()]
+
+
+class ParserEngine:
+    """
+    Обёртка над HTML-парсером. Парсер цен работает только через эти четыре
+    метода, поэтому любой движок даёт одинаковые словари {символ: цена}.
+    """
+    name = None
+
+    def parse(self, html: str):
+        raise NotImplementedError
+
+    def select(self, node, css: str) -> list:
+        raise NotImplementedError
+
+    def select_one(self, node, css: str):
+        found = self.select(node, css)
+        return found[0] if found else None
+
+    def text(self, node, strip: bool = False) -> str:
+        """
+        Текст узла вместе с потомками. strip=True обрезает пробелы у каждого
+        текстового куска и склеивает их, как BeautifulSoup.get_text(strip=True).
+        """
+        raise NotImplementedError
+
+
+class SoupEngine(ParserEngine):
+    """
+    BeautifulSoup со встроенным html.parser — исходное поведение парсера.
+    """
+    name = "html.parser"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, "html.parser")
+
+    def select(self, node, css: str) -> list:
+        return node.select(css)
+
+    def select_one(self, node, css: str):
+        return node.select_one(css)
+
+    def text(self, node, strip: bool = False) -> str:
+        return node.get_text(strip=True) if strip else node.get_text()
+
+
+class LxmlEngine(ParserEngine):
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+
+        self._html = lxml.html
+        # Компиляция CSS в XPath дорогая, делаем её один раз на селектор
+        self._compile = lru_cache(maxsize=None)(CSSSelector)
+
+    def parse(self, html: str):
+        return self._html.document_fromstring(html)
+
+    def select(self, node, css: str) -> list:
+        return self._compile(css)(node)
+
+    def text(self, node, strip: bool = False) -> str:
+        if strip:
+            return "".join(piece.strip() for piece in node.itertext())
+        return node.text_content()
+
+
+class SelectolaxEngine(ParserEngine):
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str):
+        return self._parser(html)
+
+    def select(self, node, css: str) -> list:
+        return node.css(css)
+
+    def select_one(self, node, css: str):
+        return node.css_first(css)
+
+    def text(self, node, strip: bool = False) -> str:
+        return node.text(deep=True, separator="", strip=strip)
+
+
+ENGINES = {
+    SoupEngine.name: SoupEngine,
+    LxmlEngine.name: LxmlEngine,
+    SelectolaxEngine.name: SelectolaxEngine,
+}
+
+
+def get_engine(name: str) -> ParserEngine:
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"Неизвестный движок парсинга: {name}. Доступные: {', '.join(ENGINES)}")
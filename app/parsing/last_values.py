@@ -0,0 +1,60 @@
+from datetime import timedelta
+from sqlalchemy import select
+from app.db.session import Source, Price
+from app.parsing.config import CHANGE_EPSILON, CHANGE_HEARTBEAT
+
+
+class LastValueCache:
+    """
+    Последняя записанная в prices цена и её время для каждой пары (источник, валюта).
+    Тик, цена которого не сдвинулась больше чем на epsilon (относительно) и с прошлой
+    записи прошло меньше heartbeat секунд, не перезаписывает строку prices.
+    """
+    def __init__(self, epsilon: float = CHANGE_EPSILON, heartbeat: float = CHANGE_HEARTBEAT):
+        self.epsilon = epsilon
+        self.heartbeat = timedelta(seconds=heartbeat)
+        self.values = {}  # (источник, валюта) -> (цена, время)
+        self.stats = {"seen": 0, "written": 0, "skipped": 0, "heartbeats": 0}
+
+    def warm(self, db_manager) -> int:
+        """
+        Заполняет кэш из таблицы prices — после рестарта воркера неизменные цены не перезаписываются.
+        """
+        with db_manager.get_db_session() as db:
+            rows = db.execute(
+                select(Source.name, Price.currency, Price.price, Price.timestamp).join(Price.source)
+            ).all()
+        for name, currency, price, timestamp in rows:
+            self.values[name, currency] = (price, timestamp)
+        return len(rows)
+
+    def changed(self, last: float, price: float) -> bool:
+        return abs(price - last) > self.epsilon * abs(last) if self.epsilon else price != last
+
+    def mark(self, ticks: list) -> int:
+        """
+        Помечает тики, которые нужно перезаписать в prices (tick["changed"] = True),
+        и запоминает их как последние записанные. Возвращает число помеченных.
+        История (price_ticks) и свечи получают все тики независимо от пометки.
+        """
+        changed = 0
+        for tick in ticks:
+            key = tick["source"], tick["currency"]
+            last = self.values.get(key)
+            tick["changed"] = True
+            if last is not None and not self.changed(last[0], tick["price"]):
+                if tick["timestamp"] - last[1] < self.heartbeat:
+                    tick["changed"] = False
+                    continue
+                self.stats["heartbeats"] += 1
+            self.values[key] = (tick["price"], tick["timestamp"])
+            changed += 1
+        self.stats["seen"] += len(ticks)
+        self.stats["written"] += changed
+        self.stats["skipped"] += len(ticks) - changed
+        return changed
+
+    def report(self) -> dict:
+        seen = self.stats["seen"]
+        # Доля тиков, которые не пришлось перезаписывать в prices
+        return {**self.stats, "reduction": round(self.stats["skipped"] / seen, 3) if seen else 0.0}
@@ -0,0 +1,70 @@
+import re
+
+# Знак и число вместе с разделителями: цифры, точки, запятые, апострофы и любые пробелы (включая NBSP)
+NUMBER = re.compile(r"([-−]?)(\d[\d\s.,']*)")
+# Десятичный разделитель по формату источника; второй знак считается разделителем тысяч
+DECIMAL = {"ru": ",", "en": "."}
+
+
+def looks_grouped(token: str, separator: str) -> bool:
+    """
+    Похоже ли число на сгруппированное по тысячам: "1.000", "12,345,678".
+    "0.123" и "1000.50" группировкой не считаются.
+    """
+    head, *groups = token.split(separator)
+    return 1 <= len(head) <= 3 and head != "0" and all(len(group) == 3 for group in groups)
+
+
+def parse_price(text: str, number_format: str = "ru"):
+    """
+    Превращает текст цены в float за один проход: "1 234,56 $", "$1,234.56 USD",
+    "1.234,56", "0,00012 ₽". Возвращает None, если числа в тексте нет.
+
+    Если в числе есть и точка, и запятая, дробная часть — после последнего
+    из них. Если знак один, он дробный, когда совпадает с десятичным
+    разделителем формата или не похож на группировку тысяч.
+    Поэтому в формате ru "1.234" — это 1234.0 (прежняя цепочка очистки давала 1.234),
+    а в формате en "1,234" — 1234.0.
+    """
+    match = NUMBER.search(text)
+    if match is None:
+        return None
+    sign, token = match.groups()
+    # Пробелы любого вида и апостроф — всегда разделители разрядов.
+    # split()/join в C быстрее, чем str.translate с не-ASCII таблицей
+    token = "".join(token.split())
+    if token[-1] in ".,":
+        token = token.rstrip(".,")
+    if "'" in token:
+        token = token.replace("'", "")
+
+    decimal = DECIMAL[number_format]
+    if "," in token:
+        if "." in token:
+            point = max(token.rfind("."), token.rfind(","))
+            token = token[:point].replace(".", "").replace(",", "") + "." + token[point + 1:]
+        elif token.count(",") > 1 or (decimal != "," and looks_grouped(token, ",")):
+            token = token.replace(",", "")
+        else:
+            token = token.replace(",", ".")
+    elif "." in token and (token.count(".") > 1 or (decimal != "." and looks_grouped(token, "."))):
+        token = token.replace(".", "")
+
+    try:
+        value = float(token)
+    except ValueError:
+        return None
+    return -value if sign else value
+
+
+def parse_prices(prices: dict, number_format: str = "ru") -> dict:
+    """
+    Пакетная версия parse_price для всего источника: {тикер: текст} -> {тикер: float}.
+    Строки без числа отбрасываются.
+    """
+    result = {}
+    for symbol, text in prices.items():
+        value = parse_price(text, number_format)
+        if value is not None:
+            result[symbol] = value
+    return result
@@ -1,9 +1,23 @@
+import os
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from contextlib import contextmanager
 from datetime import datetime
-from app.db.session import SessionLocal, VBRPrice, InvestingPrice, BitInfoPrice
+# Запуск из командной строки — пул и таймауты роли cli (см. app/db/config.py); выставляем до импорта app.db
+if __name__ == "__main__":
+    os.environ.setdefault("APP_ROLE", "cli")
+
+from app.db.session import SessionLocal, Source, Price, PriceTick
+from app.db.partitions import TICK_PARTITIONS
+from app.parsing.config import UPSERT_BATCH_SIZE
+from app.parsing.rollups import OHLC_PARTITIONS, update_rollups
+from app.parsing.sources import SOURCES
 # python -m app.parsing.pars_in_db
 
+# Поля тика, которые пишутся в price_ticks
+TICK_COLUMNS = ("source", "currency", "price", "timestamp")
+
 
 class DatabaseManager:
     """
@@ -11,6 +25,8 @@ class DatabaseManager:
     """
     def __init__(self):
         self.session_factory = SessionLocal
+        # Кэш id источников из таблицы sources, заполняется при первой записи
+        self.sources = None
 
     @contextmanager
     def get_db_session(self):
@@ -23,65 +39,96 @@ class DatabaseManager:
         finally:
             db.close()
 
-    def preprocess_prices(self, data: list) -> list:
+    def source_ids(self, db: Session) -> dict:
         """
-        Преобразует строковые цены в числа и удаляет лишние пробелы.
+        Идентификаторы источников реестра в таблице sources (имя -> id).
+        Недостающие источники добавляются — новый источник не требует ни таблицы, ни миграции.
         """
-        for item in data:
-            item["vbr_price"] = float(item["vbr_price"].replace(" ", ""))
-            item["investing_price"] = float(item["investing_price"].replace(" ", ""))
-            item["bitinfo_price"] = float(item["bitinfo_price"].replace(" ", ""))
-        return data
+        if self.sources is None:
+            statement = insert(Source).values([{"name": spec.name, "title": spec.title} for spec in SOURCES])
+            db.execute(statement.on_conflict_do_nothing(index_elements=[Source.name]))
+            names = [spec.name for spec in SOURCES]
+            self.sources = dict(db.execute(select(Source.name, Source.id).where(Source.name.in_(names))).all())
+        return self.sources
 
     def import_data_to_db(self, data: list):
         """
-        Импортирует данные в соответствующие таблицы в базе данных.
-        Обновляет записи, если они существуют для валюты.
+        Импортирует строки парсера ({"currency", "<источник>_price"}) в базу данных.
+        """
+        self.write_ticks(ticks_from_rows(data, datetime.utcnow()))
+
+    def write_ticks(self, ticks: list):
         """
+        Записывает тики ({"source", "currency", "price", "timestamp"}) одной транзакцией:
+        последние цены — многострочным INSERT ... ON CONFLICT (source_id, currency) DO UPDATE
+        (пачками по UPSERT_BATCH_SIZE строк), все тики — в историю price_ticks,
+        и сливает их в свечи OHLC. Тики с "changed": False (см. LastValueCache)
+        пишутся в историю и свечи, но строку prices не перезаписывают.
+        """
+        if not ticks:
+            return
         with self.get_db_session() as db:
-            for item in data:
-                # Запись для VBR
-                vbr_record = db.query(VBRPrice).filter(VBRPrice.currency == item["currency"]).first()
-                if vbr_record:
-                    vbr_record.price = item["vbr_price"]
-                    vbr_record.timestamp = datetime.utcnow()  # Обновляем временную метку
-                else:
-                    vbr_price = VBRPrice(
-                        currency=item["currency"],
-                        price=item["vbr_price"],
-                        timestamp=datetime.utcnow()
-                    )
-                    db.add(vbr_price)
-
-                # Запись для Investing
-                investing_record = db.query(InvestingPrice).filter(InvestingPrice.currency == item["currency"]).first()
-                if investing_record:
-                    investing_record.price = item["investing_price"]
-                    investing_record.timestamp = datetime.utcnow()  # Обновляем временную метку
-                else:
-                    investing_price = InvestingPrice(
-                        currency=item["currency"],
-                        price=item["investing_price"],
-                        timestamp=datetime.utcnow()
-                    )
-                    db.add(investing_price)
-
-                # Запись для BitInfo
-                bitinfo_record = db.query(BitInfoPrice).filter(BitInfoPrice.currency == item["currency"]).first()
-                if bitinfo_record:
-                    bitinfo_record.price = item["bitinfo_price"]
-                    bitinfo_record.timestamp = datetime.utcnow()  # Обновляем временную метку
-                else:
-                    bitinfo_price = BitInfoPrice(
-                        currency=item["currency"],
-                        price=item["bitinfo_price"],
-                        timestamp=datetime.utcnow()
-                    )
-                    db.add(bitinfo_price)
+            # Секции истории и справочник источников — отдельной транзакцией, чтобы не откатиться вместе с данными
+            now = datetime.utcnow()
+            oldest = min(tick["timestamp"] for tick in ticks).date()
+            for partitions in (TICK_PARTITIONS, OHLC_PARTITIONS):
+                partitions.ensure(db.connection(), now)
+                if oldest < now.date():
+                    # Тики из буфера или спула могут относиться к прошлым суткам
+                    partitions.create(db.connection(), oldest, now.date())
+            sources = self.source_ids(db)
+            db.commit()
+
+            # Последняя цена по (источник, валюта): повтор в одном INSERT ... ON CONFLICT — ошибка PostgreSQL
+            rows = {}
+            for tick in ticks:
+                source_id = sources.get(tick["source"])
+                if source_id is None or not tick.get("changed", True):
+                    continue
+                key = source_id, tick["currency"]
+                if key not in rows or rows[key]["timestamp"] <= tick["timestamp"]:
+                    rows[key] = {"source_id": source_id, "currency": tick["currency"], "price": tick["price"], "timestamp": tick["timestamp"]}
+            rows = list(rows.values())
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                db.execute(upsert_statement(rows[start:start + UPSERT_BATCH_SIZE]))
+
+            # Последние цены перезаписываются, а в price_ticks каждая цена дописывается в историю
+            history = [{column: tick[column] for column in TICK_COLUMNS} for tick in ticks]
+            for start in range(0, len(history), UPSERT_BATCH_SIZE):
+                db.execute(insert(PriceTick).values(history[start:start + UPSERT_BATCH_SIZE]))
+            # Свечи 1m/1h/1d обновляются той же транзакцией, что и сырые тики
+            update_rollups(db, ticks)
 
             db.commit()  # Сохраняем изменения
 
 
+def ticks_from_rows(data: list, timestamp: datetime) -> list:
+    """
+    Строки парсера ({"currency", "<источник>_price"}) -> тики по источникам реестра.
+    Тикер приводится к верхнему регистру, как в миграции и загрузке истории.
+    """
+    return [
+        {"source": spec.name, "currency": item["currency"].upper(), "price": item[f"{spec.name}_price"], "timestamp": timestamp}
+        for item in data
+        for spec in SOURCES
+        if f"{spec.name}_price" in item
+    ]
+
+
+def upsert_statement(rows: list):
+    """
+    INSERT ... ON CONFLICT (source_id, currency) DO UPDATE для таблицы prices.
+    Опирается на уникальное ограничение uq_prices_source_currency.
+    """
+    statement = insert(Price).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[Price.source_id, Price.currency],
+        set_={"price": statement.excluded.price, "timestamp": statement.excluded.timestamp},
+        # Запоздавшие тики (из спула) не перетирают более свежую цену
+        where=Price.timestamp <= statement.excluded.timestamp,
+    )
+
+
 if __name__ == "__main__":
     from app.parsing.parsing import CryptoScraper, CryptoDataProcessor
 
@@ -90,11 +137,8 @@ if __name__ == "__main__":
     processor = CryptoDataProcessor(scraper)
     db_manager = DatabaseManager()
 
-    # Получаем данные из парсинга
+    # Получаем данные из парсинга (цены уже числа)
     crypto_prices = processor.get_crypto_prices()
 
-    # Предобрабатываем данные
-    crypto_prices = db_manager.preprocess_prices(crypto_prices)
-
     # Импортируем данные в базу
     db_manager.import_data_to_db(crypto_prices)
@@ -105,103 +105,437 @@
 #     print(prices)
 
 
+import asyncio
+import time
 import requests
-from bs4 import BeautifulSoup
-import re
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.util.request import ACCEPT_ENCODING
+from app.parsing.config import (
+    SCRAPER_MODE, SCRAPER_POOL_SIZE, SCRAPER_KEEPALIVE_EXPIRY, PARSER_ENGINE, PARSER_TARGETED,
+    SCRAPER_HEDGE, SCRAPER_CYCLE_DEADLINE, TRACKED_SYMBOLS, MIN_SOURCES_PER_SYMBOL, INGEST_PARSE_WORKERS,
+    source_timeout,
+)
+from app.parsing.engines import get_engine, iter_tables
+from app.parsing.normalize import parse_prices
+from app.parsing.resilience import LatencyTracker, CircuitBreaker
+from app.parsing.pipeline import ParsePool
+from app.parsing.sources import SOURCES, SourceSpec
 
 class CryptoScraper:
-    def __init__(self):
-        self.vbr_url = "https://www.vbr.ru/crypto/"
-        self.investing_url = "https://ru.investing.com/crypto"
-        self.bitinfo_url = "https://bitinfocharts.com/ru/crypto-kurs/"
+    """
+    Парсер цен. Экземпляр рассчитан на долгую жизнь (один на воркер):
+    держит пул keep-alive соединений на каждый хост и помнит ETag/Last-Modified
+    страниц, чтобы не скачивать и не разбирать их повторно при ответе 304.
+
+    Источники берутся из реестра (app.parsing.sources): один и тот же код
+    скачивает и разбирает любой из них по его SourceSpec.
+    """
+    def __init__(self, engine: str = None, targeted: bool = None, sources: list = None):
+        self.sources = {source.name: source for source in (sources or SOURCES)}
+        self.engine = get_engine(engine or PARSER_ENGINE)
+        self.targeted = PARSER_TARGETED if targeted is None else targeted
+
+        self.sessions = {}  # хост -> requests.Session
+        self.clients = {}  # хост -> httpx.AsyncClient
+        self.loop = None  # постоянный event loop, к нему привязаны httpx-клиенты
+        self.validators = {}  # url -> {"etag": ..., "last_modified": ...}
+        self.cache = {}  # url -> последний разобранный результат
+        self.stats = {
+            "requests": 0, "new_connections": 0, "reused_connections": 0, "not_modified": 0,
+            "timeouts": 0, "hedged": 0, "breaker_skips": 0,
+        }
+        self.latency = {name: LatencyTracker() for name in self.sources}
+        self.breakers = {name: CircuitBreaker() for name in self.sources}
+        self.parse_pool = ParsePool() if INGEST_PARSE_WORKERS > 0 else None
+
+    def parse_source(self, source: SourceSpec, html: str):
+        """
+        Разбирает страницу источника в {тикер: цена (float)}.
+
+        Обычный режим строит DOM всей страницы и ищет строки селектором
+        source.rows. Целевой режим (PARSER_TARGETED=1) вырезает из html
+        таблицы верхнего уровня по очереди, строит DOM только для них
+        (селектор source.table_rows) и останавливается на первой таблице с ценами.
+        """
+        engine = self.engine
+        if not self.targeted:
+            return self.parse_rows(source, engine.select(engine.parse(html), source.rows))
+
+        for fragment in iter_tables(html):
+            data = self.parse_rows(source, engine.select(engine.parse(fragment), source.table_rows))
+            if data:
+                return data
+        return {}
+
+    def parse_rows(self, source: SourceSpec, rows):
+        engine = self.engine
+        raw_prices = {}
 
-    @staticmethod
-    def clean_price(price: str):
-        price = re.sub(r'\.(?=.*\.)', '', price)  # Убираем лишние точки
-        return price
-
-    def get_vbr_data(self):
-        response = requests.get(self.vbr_url)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        coins = soup.select('table tbody tr')
-        vbr_data = {}
-
-        for coin in coins:
-            name_tag = coin.select_one('td:nth-child(1) span')
-            price_tag = coin.select_one('td:nth-child(3) div')
-
-            if name_tag and price_tag:
-                name = name_tag.text.strip()
-                price = price_tag.text.replace(' $', '').strip()
-                vbr_data[name] = price
-
-        return vbr_data
-
-    def get_investing_data(self):
-        response = requests.get(self.investing_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        table_rows = soup.select('div:nth-of-type(5) > div > div:nth-of-type(2) > div:nth-of-type(1) > table > tbody > tr')
-
-        investing_data = {}
-        for row in table_rows:
-            try:
-                currency_name = row.select_one('td:nth-of-type(3)').get_text(strip=True)
-                numeric_value = row.select_one('td:nth-of-type(4) > span').get_text(strip=True)
-                investing_data[currency_name] = numeric_value
-            except Exception:
+        for row in rows:
+            symbol_tag = engine.select_one(row, source.symbol)
+            price_tag = engine.select_one(row, source.price)
+            if symbol_tag is None or price_tag is None:
                 continue
 
-        return investing_data
+            symbol = engine.text(symbol_tag, strip=source.symbol_strip).strip()
+            if source.symbol_first_word:
+                symbol = symbol.split(maxsplit=1)[0] if symbol else symbol
+            if symbol:
+                raw_prices[symbol] = engine.text(price_tag)
+
+        return parse_prices(raw_prices, source.number_format)
+
+    def get_session(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        session = self.sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SCRAPER_POOL_SIZE))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=SCRAPER_POOL_SIZE))
+            session.headers.update({"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"})
+            self.sessions[host] = session
+        return session
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        host = urlsplit(url).netloc
+        client = self.clients.get(host)
+        if client is None:
+            # Accept-Encoding (gzip/deflate/br) httpx выставляет сам.
+            # Свой таймаут httpx (5 с по умолчанию) отключён: срок запроса задаёт
+            # hedged_get по SCRAPER_SOURCE_TIMEOUT и адаптивному таймауту источника
+            client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=None,
+                limits=httpx.Limits(
+                    max_connections=SCRAPER_POOL_SIZE,
+                    max_keepalive_connections=SCRAPER_POOL_SIZE,
+                    keepalive_expiry=SCRAPER_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self.clients[host] = client
+        return client
+
+    def conditional_headers(self, url: str) -> dict:
+        """
+        Заголовки условного GET. Отправляем их, только если есть
+        сохранённый результат разбора, которым можно ответить на 304.
+        """
+        validators = self.validators.get(url)
+        if not validators or url not in self.cache:
+            return {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def remember_response(self, url: str, response, data: dict):
+        if not data:
+            return
+        self.cache[url] = data
+        self.validators[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
 
-    def get_bitinfo_data(self):
-        response = requests.get(self.bitinfo_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('table tbody tr')
-
-        bitinfo_data = {}
-        for row in rows:
-            try:
-                currency_name = row.select_one('td:nth-of-type(1)').text.strip()
-                short_name = currency_name.split()[0]
-                price = row.select_one('td:nth-of-type(2) a').text.strip()
-                price = re.sub(r'[^\d.]', '', price)
-                bitinfo_data[short_name] = price
-            except Exception:
-                continue
+    @staticmethod
+    def opened_connections(adapter: HTTPAdapter) -> int:
+        """
+        Сколько соединений urllib3 открыл за всё время во всех пулах адаптера.
+        """
+        pools = adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def count_connection(self, new_connection: bool):
+        self.stats["requests"] += 1
+        if new_connection:
+            self.stats["new_connections"] += 1
+        else:
+            self.stats["reused_connections"] += 1
+
+    def handle_response(self, source: SourceSpec, url: str, response):
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return self.cache[url]
+
+        data = self.parse_source(source, response.text)
+        self.remember_response(url, response, data)
+        return data
+
+    async def handle_response_async(self, source: SourceSpec, url: str, response):
+        """
+        Как handle_response, но при включённом конвейере (INGEST_PARSE_WORKERS > 0)
+        разбор уходит в пул процессов, не блокируя загрузку остальных страниц.
+        """
+        if self.parse_pool is None or response.status_code == 304:
+            return self.handle_response(source, url, response)
+
+        data = await self.parse_pool.parse(source, response.text, self.engine.name, self.targeted)
+        self.remember_response(url, response, data)
+        return data
 
-        return bitinfo_data
+    @staticmethod
+    def merge_pages(pages: list) -> dict:
+        # При повторе тикера на нескольких страницах приоритет у более ранней
+        merged = {}
+        for page in reversed(pages):
+            merged.update(page)
+        return merged
+
+    def fetch_page(self, source: SourceSpec, url: str) -> dict:
+        name = source.name
+        session = self.get_session(url)
+        adapter = session.get_adapter(url)
+        connections_before = self.opened_connections(adapter)
+        timeout = self.latency[name].timeout(source_timeout(name))
+
+        started = time.monotonic()
+        try:
+            response = session.get(url, headers=self.conditional_headers(url), timeout=timeout)
+        except requests.Timeout:
+            self.record_failure(name, timeout)
+            print(f"⚠️ {name}: таймаут {timeout:.1f} с ({url})")
+            return {}
+        except requests.RequestException as e:
+            self.record_failure(name)
+            print(f"⚠️ {name}: ошибка запроса {e}")
+            return {}
+        self.count_connection(self.opened_connections(adapter) > connections_before)
+        if response.status_code >= 400:
+            self.record_failure(name)
+            print(f"⚠️ {name}: HTTP {response.status_code} ({url})")
+            return {}
+        self.record_success(name, time.monotonic() - started)
+
+        return self.handle_response(source, url, response)
+
+    def get_source_data(self, name: str):
+        """
+        Синхронный опрос источника (все страницы по очереди) с адаптивным
+        таймаутом и предохранителем. Дублирующие запросы есть только в async-режиме.
+        """
+        source = self.sources[name]
+        if not self.breakers[name].allow():
+            self.stats["breaker_skips"] += 1
+            return {}
+        return self.merge_pages([self.fetch_page(source, url) for url in source.page_urls()])
+
+    def get_all_data(self):
+        return {name: self.get_source_data(name) for name in self.sources}
+
+    def record_success(self, name: str, elapsed: float):
+        self.latency[name].record(elapsed)
+        self.breakers[name].record_success()
+
+    def record_failure(self, name: str, timed_out_after: float = None):
+        # Таймаут тоже попадает в окно задержек, иначе p99 не вырастет,
+        # если источник стал стабильно медленнее
+        if timed_out_after is not None:
+            self.stats["timeouts"] += 1
+            self.latency[name].record(timed_out_after)
+        self.breakers[name].record_failure()
+
+    async def hedged_get(self, name: str, url: str, timeout: float):
+        """
+        GET с дублированием: если первый запрос не ответил за p95 задержки
+        источника, отправляется второй, и берётся тот ответ, что придёт раньше.
+        Возвращает (ответ, открывалось ли новое соединение).
+        """
+        client = self.get_client(url)
+        headers = self.conditional_headers(url)
+        new_connections = {}
+
+        def send():
+            async def trace(event_name, info):
+                if event_name == "connection.connect_tcp.started":
+                    new_connections[task] = True
+
+            task = asyncio.ensure_future(client.get(url, headers=headers, extensions={"trace": trace}))
+            return task
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pending = {send()}
+        hedge_delay = self.latency[name].hedge_delay() if SCRAPER_HEDGE else None
+
+        try:
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    self.stats["hedged"] += 1
+                    pending.add(send())
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), new_connections.get(task, False)
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_page_async(self, source: SourceSpec, url: str) -> dict:
+        name = source.name
+        timeout = self.latency[name].timeout(source_timeout(name))
+        started = time.monotonic()
+        try:
+            response, new_connection = await self.hedged_get(name, url, timeout)
+        except asyncio.TimeoutError:
+            self.record_failure(name, timeout)
+            print(f"⚠️ {name}: таймаут {timeout:.1f} с ({url})")
+            return {}
+        except httpx.TimeoutException as e:
+            # Таймаут на уровне httpx (соединение, чтение) — тоже таймаут: время идёт в окно задержек
+            elapsed = time.monotonic() - started
+            self.record_failure(name, elapsed)
+            print(f"⚠️ {name}: таймаут httpx через {elapsed:.1f} с ({url}): {e!r}")
+            return {}
+        except httpx.HTTPError as e:
+            self.record_failure(name)
+            print(f"⚠️ {name}: ошибка запроса {e}")
+            return {}
+        self.count_connection(new_connection)
+        if response.status_code >= 400:
+            self.record_failure(name)
+            print(f"⚠️ {name}: HTTP {response.status_code} ({url})")
+            return {}
+        self.record_success(name, time.monotonic() - started)
+        if self.parse_pool is not None:
+            self.parse_pool.record("fetch", time.monotonic() - started)
+
+        return await self.handle_response_async(source, url, response)
+
+    async def get_source_data_async(self, name: str):
+        """
+        Скачивает и разбирает все страницы источника параллельно. При таймауте,
+        ошибке сети или открытом предохранителе страница даёт пустой словарь,
+        чтобы остальные страницы и источники не пропали.
+        """
+        source = self.sources[name]
+        if not self.breakers[name].allow():
+            self.stats["breaker_skips"] += 1
+            return {}
+        # Страниц не больше, чем соединений в пуле хоста: иначе ожидание
+        # свободного соединения засчитывалось бы в таймаут запроса
+        slots = asyncio.Semaphore(SCRAPER_POOL_SIZE)
+
+        async def fetch(url):
+            async with slots:
+                return await self.fetch_page_async(source, url)
+
+        pages = await asyncio.gather(*(fetch(url) for url in source.page_urls()))
+        return self.merge_pages(pages)
+
+    async def get_all_data_async(self):
+        """
+        Опрашивает все источники одновременно: цикл длится столько,
+        сколько самый медленный источник, а не их сумма, и не дольше
+        SCRAPER_CYCLE_DEADLINE — не успевшие источники отдают пустой словарь.
+        """
+        tasks = {name: asyncio.ensure_future(self.get_source_data_async(name)) for name in self.sources}
+        done, pending = await asyncio.wait(tasks.values(), timeout=SCRAPER_CYCLE_DEADLINE)
+        for task in pending:
+            task.cancel()
+
+        data = {}
+        for name, task in tasks.items():
+            if task in done:
+                data[name] = task.result()
+            else:
+                self.record_failure(name, SCRAPER_CYCLE_DEADLINE)
+                print(f"⚠️ {name}: не уложился в бюджет цикла {SCRAPER_CYCLE_DEADLINE} с")
+                data[name] = {}
+        return data
+
+    def latency_report(self) -> dict:
+        """
+        Текущие p50/p95/p99, таймаут и состояние предохранителя по источникам.
+        """
+        return {
+            name: {
+                "p50": self.latency[name].percentile(50),
+                "p95": self.latency[name].percentile(95),
+                "p99": self.latency[name].percentile(99),
+                "timeout": self.latency[name].timeout(source_timeout(name)),
+                "breaker": self.breakers[name].state,
+            }
+            for name in self.sources
+        }
+
+    def run(self, coro):
+        """
+        Выполняет корутину на постоянном event loop парсера, чтобы
+        httpx-клиенты и их keep-alive соединения жили между циклами.
+        """
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(coro)
+
+    def close(self):
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        for session in self.sessions.values():
+            session.close()
+        if self.loop is not None and not self.loop.is_closed():
+            for client in self.clients.values():
+                self.loop.run_until_complete(client.aclose())
+            self.loop.close()
+        self.sessions.clear()
+        self.clients.clear()
 
 class CryptoDataProcessor:
     def __init__(self, scraper):
         self.scraper = scraper
 
     def get_crypto_prices(self):
-        vbr_data = self.scraper.get_vbr_data()
-        investing_data = self.scraper.get_investing_data()
-        bitinfo_data = self.scraper.get_bitinfo_data()
-
-        # print(f"VBR данные: {vbr_data}")  # 🔥 Лог
-        # print(f"Investing данные: {investing_data}")  # 🔥 Лог
-        # print(f"Bitinfo данные: {bitinfo_data}")  # 🔥 Лог
-
-        common_currencies = set(vbr_data.keys()) & set(investing_data.keys()) & set(bitinfo_data.keys())
-
-        desired_order = ["SOL", "BTC", "LINK", "DOGE", "ADA", "BNB", "LTC", "ETH", "XRP"]
-        crypto_prices = []
-
-        for currency in desired_order:
-            if currency in common_currencies:
-                vbr_price = self.scraper.clean_price(vbr_data[currency].replace(',', '.'))
-                investing_price = self.scraper.clean_price(investing_data[currency].replace(',', '.'))
-                bitinfo_price = self.scraper.clean_price(bitinfo_data[currency].replace(',', '.'))
-
-                crypto_prices.append({
-                    "currency": currency,
-                    "vbr_price": vbr_price,
-                    "investing_price": investing_price,
-                    "bitinfo_price": bitinfo_price
-                })
-        print(f"Финальные данные: {crypto_prices}")  # 🔥 Лог
+        """
+        Синхронная точка входа (её вызывает Celery-задача).
+        В режиме SCRAPER_MODE=async источники опрашиваются параллельно.
+        """
+        if SCRAPER_MODE == "async":
+            return self.scraper.run(self.get_crypto_prices_async())
+        return self.combine(self.scraper.get_all_data())
+
+    async def get_crypto_prices_async(self):
+        return self.combine(await self.scraper.get_all_data_async())
+
+    def combine(self, data: dict):
+        """
+        Сводит {источник: {тикер: цена}} в строки
+        {"currency": ..., "<источник>_price": ...}. Валюта попадает в результат,
+        если она есть хотя бы в MIN_SOURCES_PER_SYMBOL источниках; колонки
+        источников, где её нет, просто отсутствуют. Порядок — как в
+        TRACKED_SYMBOLS, для "all" — по алфавиту. Время и память линейны
+        по числу пар (источник, тикер).
+        """
+        # print(f"Данные источников: {data}")  # 🔥 Лог
+
+        rows = {}
+        for name, prices in data.items():
+            key = f"{name}_price"
+            for currency, price in prices.items():
+                # Тикеры хранятся в верхнем регистре: API ищет по currency.upper()
+                currency = currency.upper()
+                row = rows.get(currency)
+                if row is None:
+                    row = rows[currency] = {"currency": currency}
+                row[key] = price
+
+        universe = TRACKED_SYMBOLS if TRACKED_SYMBOLS is not None else sorted(rows)
+        crypto_prices = [
+            rows[currency] for currency in universe
+            if currency in rows and len(rows[currency]) - 1 >= MIN_SOURCES_PER_SYMBOL
+        ]
+        print(f"Финальные данные: {len(crypto_prices)} валют")  # 🔥 Лог
 
         return crypto_prices
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.parsing.config import INGEST_PARSE_WORKERS, INGEST_PARSE_QUEUE
+from app.parsing.sources import SourceSpec
+
+# Парсеры внутри процессов пула: создаются один раз на процесс
+_parsers = {}
+
+
+def parse_page(source: SourceSpec, html: str, engine: str, targeted: bool, submitted_at: float):
+    """
+    Выполняется в процессе пула. Возвращает (данные, момент начала разбора,
+    длительность разбора), чтобы отделить ожидание в очереди от самого разбора.
+    """
+    from app.parsing.parsing import CryptoScraper
+
+    started_at = time.time()
+    parser = _parsers.get((engine, targeted))
+    if parser is None:
+        parser = _parsers[engine, targeted] = CryptoScraper(engine=engine, targeted=targeted, sources=[source])
+    data = parser.parse_source(source, html)
+    return data, started_at, time.time() - started_at
+
+
+class ParsePool:
+    """
+    Ограниченный пул процессов для разбора HTML. Пока страница разбирается
+    в другом процессе, event loop воркера продолжает загрузки. Не больше
+    queue_size страниц одновременно ждут или проходят разбор: следующая
+    загрузка, готовая к разбору, ждёт свободного места (backpressure).
+    """
+    def __init__(self, workers: int = INGEST_PARSE_WORKERS, queue_size: int = INGEST_PARSE_QUEUE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor = None
+        self.slots = None  # asyncio.Semaphore, создаётся в event loop парсера
+        self.depth = 0
+        self.max_depth = 0
+        self.timings = {stage: [0.0, 0] for stage in ("fetch", "backpressure", "queue", "parse")}
+
+    def record(self, stage: str, seconds: float):
+        self.timings[stage][0] += seconds
+        self.timings[stage][1] += 1
+
+    async def parse(self, source: SourceSpec, html: str, engine: str, targeted: bool) -> dict:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.slots = asyncio.Semaphore(self.queue_size)
+
+        waited = time.monotonic()
+        async with self.slots:
+            self.record("backpressure", time.monotonic() - waited)
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            try:
+                submitted_at = time.time()
+                data, started_at, parse_seconds = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, parse_page, source, html, engine, targeted, submitted_at
+                )
+            finally:
+                self.depth -= 1
+        self.record("queue", started_at - submitted_at)
+        self.record("parse", parse_seconds)
+        return data
+
+    def report(self) -> dict:
+        """
+        Глубина очереди разбора (текущая и максимальная) и среднее время
+        этапов в мс: загрузка, ожидание места в очереди, очередь пула, разбор.
+        """
+        report = {"parse_queue_depth": self.depth, "parse_queue_max_depth": self.max_depth}
+        for stage, (total, count) in self.timings.items():
+            report[f"{stage}_ms"] = round(1000 * total / count, 2) if count else None
+        return report
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
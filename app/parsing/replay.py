@@ -0,0 +1,190 @@
+import argparse
+import dataclasses
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+from app.parsing.sources import SOURCES
+# python -m app.parsing.replay record fixtures/
+# python -m app.parsing.replay serve fixtures/ --latency 0.3 --jitter 0.1
+
+
+def fixture_name(source_name: str, page: int = 1) -> str:
+    """
+    Имя фикстуры страницы листинга: первая — <источник>, следующие — <источник>-p<номер>.
+    """
+    return source_name if page == 1 else f"{source_name}-p{page}"
+
+
+def record_fixtures(directory: str, sources: list = None) -> dict:
+    """
+    Один раз скачивает все страницы листинга источников (source.page_urls()) и сохраняет их
+    как фикстуры: <папка>/<фикстура>.html и <папка>/<фикстура>.json (статус и заголовки),
+    имена — см. fixture_name. Возвращает {источник: размер страниц в байтах}.
+    """
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for source in sources or SOURCES:
+        sizes[source.name] = 0
+        for page, url in enumerate(source.page_urls(), start=1):
+            response = requests.get(url, timeout=30)
+            name = fixture_name(source.name, page)
+            (path / f"{name}.html").write_bytes(response.content)
+            meta = {
+                "url": url,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type", "text/html; charset=utf-8"),
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            (path / f"{name}.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+            sizes[source.name] += len(response.content)
+    return sizes
+
+
+class ReplayServer:
+    """
+    Локальный HTTP-сервер, отдающий сохранённые фикстуры по пути /<источник>
+    с настраиваемой задержкой (latency ± jitter, секунды). С etag=True
+    поддерживает условный GET и отвечает 304 на If-None-Match.
+
+        with ReplayServer("fixtures", latency=0.2, jitter=0.05) as server:
+            scraper = CryptoScraper(sources=server.sources())
+    """
+    def __init__(self, directory: str, latency: float = 0.0, jitter: float = 0.0,
+                 etag: bool = False, host: str = "127.0.0.1", port: int = 0):
+        self.directory = Path(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.etag = etag
+        self.pages = {}
+        for page in self.directory.glob("*.html"):
+            meta_path = page.with_suffix(".json")
+            meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+            body = page.read_bytes()
+            self.pages[page.stem] = {
+                "body": body,
+                "status": meta.get("status", 200),
+                "content_type": meta.get("content_type", "text/html; charset=utf-8"),
+                "etag": '"%s"' % hashlib.sha1(body).hexdigest(),
+            }
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def make_handler(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, как у настоящих сайтов
+            disable_nagle_algorithm = True  # иначе заголовки и тело ждут delayed ACK (~40 мс)
+
+            def do_GET(self):
+                delay = server.latency + random.uniform(-server.jitter, server.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+
+                page = server.pages.get(self.path.strip("/").split("?")[0])
+                if page is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if server.etag and self.headers.get("If-None-Match") == page["etag"]:
+                    self.send_response(304)
+                    self.send_header("ETag", page["etag"])
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(page["status"])
+                self.send_header("Content-Type", page["content_type"])
+                self.send_header("Content-Length", str(len(page["body"])))
+                if server.etag:
+                    self.send_header("ETag", page["etag"])
+                self.end_headers()
+                self.wfile.write(page["body"])
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sources(self, sources: list = None) -> list:
+        """
+        Реестр источников с URL, указывающими на этот сервер
+        (только источники, для которых есть фикстура). Страницы листинга после первой
+        тоже идут на сервер; читается столько страниц, сколько записано подряд.
+        """
+        replayed = []
+        for source in sources or SOURCES:
+            if source.name not in self.pages:
+                continue
+            pages = 1
+            while pages < source.pages and fixture_name(source.name, pages + 1) in self.pages:
+                pages += 1
+            replayed.append(dataclasses.replace(
+                source,
+                url=f"{self.base_url}/{source.name}",
+                # Шаблон для page_urls(): /<источник>-p<номер>, как в fixture_name
+                page_url=f"{self.base_url}/{source.name}-p{{page}}" if source.page_url else None,
+                pages=pages,
+            ))
+        return replayed
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Запись и воспроизведение страниц источников")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="скачать страницы источников в фикстуры")
+    record.add_argument("directory")
+
+    serve = commands.add_parser("serve", help="отдавать фикстуры локальным HTTP-сервером")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type=int, default=8800)
+    serve.add_argument("--latency", type=float, default=0.0)
+    serve.add_argument("--jitter", type=float, default=0.0)
+    serve.add_argument("--etag", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.command == "record":
+        for name, size in record_fixtures(args.directory).items():
+            print(f"{name}: {size} байт")
+        return
+
+    server = ReplayServer(args.directory, args.latency, args.jitter, args.etag, port=args.port)
+    print(f"Фикстуры {sorted(server.pages)} на {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+from collections import deque
+from app.parsing.config import (
+    SCRAPER_TIMEOUT_FACTOR, SCRAPER_MIN_TIMEOUT, SCRAPER_LATENCY_WINDOW, SCRAPER_LATENCY_MIN_SAMPLES,
+    SCRAPER_BREAKER_FAILURES, SCRAPER_BREAKER_COOLDOWN,
+)
+
+
+class LatencyTracker:
+    """
+    Скользящее окно задержек одного источника (секунды) и перцентили по нему.
+    """
+    def __init__(self, window: int = SCRAPER_LATENCY_WINDOW, min_samples: int = SCRAPER_LATENCY_MIN_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float):
+        """
+        q-й перцентиль (0..100) или None, пока замеров меньше min_samples.
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def timeout(self, ceiling: float) -> float:
+        """
+        Таймаут запроса: p99 * SCRAPER_TIMEOUT_FACTOR в пределах
+        [SCRAPER_MIN_TIMEOUT, ceiling]. Без истории — ceiling.
+        """
+        p99 = self.percentile(99)
+        if p99 is None:
+            return ceiling
+        return max(SCRAPER_MIN_TIMEOUT, min(ceiling, p99 * SCRAPER_TIMEOUT_FACTOR))
+
+    def hedge_delay(self):
+        """
+        Через сколько секунд отправлять дублирующий запрос (p95), None — не дублировать.
+        """
+        return self.percentile(95)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель источника. closed — запросы идут; после failure_threshold
+    ошибок подряд — open, источник пропускается cooldown секунд; затем
+    half_open — пропускается один пробный запрос, его успех закрывает
+    предохранитель, ошибка снова открывает.
+    """
+    def __init__(self, failure_threshold: int = SCRAPER_BREAKER_FAILURES, cooldown: float = SCRAPER_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.state = "closed"
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            return True
+        return self.state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.state = "closed"
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
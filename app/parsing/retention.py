@@ -0,0 +1,67 @@
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+# Запуск из командной строки — пул и таймауты роли cli (см. app/db/config.py); выставляем до импорта app.db
+if __name__ == "__main__":
+    os.environ.setdefault("APP_ROLE", "cli")
+
+from app.db.session import engine, without_statement_timeout
+from app.db.partitions import TICK_PARTITIONS
+from app.parsing.config import RETENTION_TICKS_DAYS, RETENTION_OHLC_1M_DAYS
+from app.parsing.rollups import OHLC_PARTITIONS, rebuild
+# python -m app.parsing.retention
+
+# Что удаляем и чем проверяем покрытие: секции, срок хранения,
+# сколько «тиков» в секции и сколько их учтено в свечах следующего разрешения
+POLICIES = (
+    (TICK_PARTITIONS, RETENTION_TICKS_DAYS,
+     "SELECT count(*) FROM {partition}",
+     "SELECT coalesce(sum(count), 0) FROM price_ohlc_1m WHERE bucket >= :lower AND bucket < :upper"),
+    (OHLC_PARTITIONS, RETENTION_OHLC_1M_DAYS,
+     "SELECT coalesce(sum(count), 0) FROM {partition}",
+     "SELECT coalesce(sum(count), 0) FROM price_ohlc_1h WHERE bucket >= :lower AND bucket < :upper"),
+)
+
+
+def covered(connection, partition: str, lower, upper, raw_sql: str, rollup_sql: str) -> bool:
+    raw = connection.execute(text(raw_sql.format(partition=partition))).scalar()
+    rolled = connection.execute(text(rollup_sql), {"lower": lower, "upper": upper}).scalar()
+    return raw == rolled
+
+
+def enforce_retention(now: datetime = None) -> dict:
+    """
+    Удаляет секции старше срока хранения целиком (DROP TABLE, без построчного DELETE).
+    Перед удалением сверяет число тиков в секции с суммой count в свечах за тот же
+    интервал; при расхождении пересчитывает свечи из ещё живых данных и сверяет снова.
+    Непокрытые секции не удаляются.
+    """
+    started = time.perf_counter()
+    today = (now or datetime.utcnow()).date()
+    report = {"dropped": [], "skipped": [], "reclaimed_bytes": 0}
+    for partitions, days, raw_sql, rollup_sql in POLICIES:
+        if days <= 0:
+            continue
+        cutoff = today - timedelta(days=days)
+        with engine.connect() as connection:
+            expired = [partition for partition in partitions.existing(connection) if partition[2] <= cutoff]
+        for name, lower, upper in expired:
+            # Каждая секция — своя транзакция: сбой на одной не откатывает уже удалённые
+            with engine.begin() as connection:
+                without_statement_timeout(connection)
+                if not covered(connection, name, lower, upper, raw_sql, rollup_sql):
+                    rebuild(connection, lower, upper)
+                    if not covered(connection, name, lower, upper, raw_sql, rollup_sql):
+                        report["skipped"].append(name)
+                        continue
+                size = connection.execute(text("SELECT pg_total_relation_size(CAST(:name AS regclass))"), {"name": name}).scalar()
+                connection.execute(text(f"DROP TABLE {name}"))
+            report["dropped"].append(name)
+            report["reclaimed_bytes"] += size
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+if __name__ == "__main__":
+    print(enforce_retention())
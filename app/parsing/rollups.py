@@ -0,0 +1,186 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from sqlalchemy import Float, case, func, text, type_coerce
+from sqlalchemy.dialects.postgresql import insert
+# Запуск из командной строки — пул и таймауты роли cli (см. app/db/config.py); выставляем до импорта app.db
+if __name__ == "__main__":
+    os.environ.setdefault("APP_ROLE", "cli")
+
+from app.db.session import engine, without_statement_timeout, PriceOhlc1m, PriceOhlc1h, PriceOhlc1d
+from app.db.partitions import PartitionManager
+from app.parsing.config import UPSERT_BATCH_SIZE
+# python -m app.parsing.rollups --start 2024-01-01 --end 2024-02-01
+
+# Разрешение -> (модель, точность date_trunc в PostgreSQL, усечение времени в Python)
+RESOLUTIONS = {
+    "1m": (PriceOhlc1m, "minute", lambda moment: moment.replace(second=0, microsecond=0)),
+    "1h": (PriceOhlc1h, "hour", lambda moment: moment.replace(minute=0, second=0, microsecond=0)),
+    "1d": (PriceOhlc1d, "day", lambda moment: moment.replace(hour=0, minute=0, second=0, microsecond=0)),
+}
+
+# Секции минутных свечей (по месяцам, на два месяца вперёд)
+OHLC_PARTITIONS = PartitionManager("price_ohlc_1m", "month", ahead=2)
+
+
+def aggregate(ticks: list, truncate) -> list:
+    """
+    Свечи пачки тиков: одна строка на (валюта, источник, начало интервала).
+    """
+    candles = {}
+    for tick in ticks:
+        moment, price = tick["timestamp"], tick["price"]
+        key = tick["currency"], tick["source"], truncate(moment)
+        candle = candles.get(key)
+        if candle is None:
+            candles[key] = {
+                "currency": key[0], "source": key[1], "bucket": key[2],
+                "open": price, "high": price, "low": price, "close": price,
+                "count": 1, "first_ts": moment, "last_ts": moment, "mean": price, "m2": 0.0,
+            }
+            continue
+        if price > candle["high"]:
+            candle["high"] = price
+        if price < candle["low"]:
+            candle["low"] = price
+        if moment < candle["first_ts"]:
+            candle["open"], candle["first_ts"] = price, moment
+        if moment >= candle["last_ts"]:
+            candle["close"], candle["last_ts"] = price, moment
+        candle["count"] += 1
+        # Уэлфорд: среднее и сумма квадратов отклонений за один проход
+        delta = price - candle["mean"]
+        candle["mean"] += delta / candle["count"]
+        candle["m2"] += delta * (price - candle["mean"])
+    return list(candles.values())
+
+
+def merge_statement(model, rows: list):
+    """
+    INSERT ... ON CONFLICT DO UPDATE, который сливает свечу пачки с уже записанной:
+    high/low — GREATEST/LEAST, open/close — от более раннего/позднего тика, count — сумма,
+    mean/m2 — слияние по Чану (все выражения SET видят старую строку).
+    """
+    statement = insert(model).values(rows)
+    new, table = statement.excluded, model.__table__.c
+    delta = new.mean - table.mean
+    total = type_coerce(table.count + new.count, Float)
+    return statement.on_conflict_do_update(
+        index_elements=[model.currency, model.source, model.bucket],
+        set_={
+            "open": case((new.first_ts < table.first_ts, new.open), else_=table.open),
+            "close": case((new.last_ts >= table.last_ts, new.close), else_=table.close),
+            "high": func.greatest(table.high, new.high),
+            "low": func.least(table.low, new.low),
+            "count": table.count + new.count,
+            "first_ts": func.least(table.first_ts, new.first_ts),
+            "last_ts": func.greatest(table.last_ts, new.last_ts),
+            "mean": table.mean + delta * new.count / total,
+            "m2": table.m2 + new.m2 + delta * delta * table.count * new.count / total,
+        },
+    )
+
+
+def update_rollups(db, ticks: list):
+    """
+    Инкрементально обновляет свечи всех разрешений по пачке тиков.
+    Вызывается в транзакции записи тиков — свечи и сырые тики согласованы.
+    """
+    for model, _, truncate in RESOLUTIONS.values():
+        rows = aggregate(ticks, truncate)
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            db.execute(merge_statement(model, rows[start:start + UPSERT_BATCH_SIZE]))
+
+
+def rebuild(connection, start: date, end: date):
+    """
+    Пересчитывает свечи за [start, end) с нуля: минутные — из price_ticks,
+    часовые — из минутных, дневные — из часовых. Нужен после загрузки истории (backfill).
+    Пересчёт идёт по дням: день, за который исходных данных уже нет (удалены по сроку
+    хранения), пропускается, и его свечи остаются как есть — даже если диапазон
+    захватывает и дни с живыми данными. Возвращает число строк по разрешениям.
+    """
+    without_statement_timeout(connection)
+    OHLC_PARTITIONS.create(connection, start, end)
+    counts = {}
+    sources = {"1m": "price_ticks", "1h": "price_ohlc_1m", "1d": "price_ohlc_1h"}
+    for resolution, (model, precision, _) in RESOLUTIONS.items():
+        table = model.__tablename__
+        column = "timestamp" if resolution == "1m" else "bucket"
+        if resolution == "1m":
+            select_sql = """
+                SELECT currency, source, date_trunc('minute', timestamp) AS bucket,
+                       (array_agg(price ORDER BY timestamp))[1], max(price), min(price),
+                       (array_agg(price ORDER BY timestamp DESC))[1], count(*), min(timestamp), max(timestamp),
+                       avg(price), var_pop(price) * count(*)
+                FROM price_ticks
+                WHERE timestamp >= :start AND timestamp < :end
+                GROUP BY 1, 2, 3
+            """
+        else:
+            # Сумма квадратов отклонений от общего среднего: внутри свечей (m2) плюс между ними.
+            # Отклонение свечи берётся от общего среднего до возведения в квадрат — без вычитания
+            # больших близких сумм; результат тот же, что у попарного слияния по Чану при записи
+            select_sql = f"""
+                SELECT currency, source, bucket,
+                       (array_agg(open ORDER BY first_ts))[1], max(high), min(low),
+                       (array_agg(close ORDER BY last_ts DESC))[1], sum(count), min(first_ts), max(last_ts),
+                       max(total_mean), sum(m2 + count * (mean - total_mean) ^ 2)
+                FROM (
+                    SELECT currency, source, date_trunc('{precision}', bucket) AS bucket,
+                           open, high, low, close, count, first_ts, last_ts, mean, m2,
+                           sum(mean * count) OVER parent / sum(count) OVER parent AS total_mean
+                    FROM {sources[resolution]}
+                    WHERE bucket >= :start AND bucket < :end
+                    WINDOW parent AS (PARTITION BY currency, source, date_trunc('{precision}', bucket))
+                ) candles
+                GROUP BY 1, 2, 3
+            """
+        counts[resolution] = 0
+        day = start
+        while day < end:
+            bounds = {"start": day, "end": day + timedelta(days=1)}
+            day += timedelta(days=1)
+            present = connection.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {sources[resolution]} WHERE {column} >= :start AND {column} < :end)"),
+                bounds,
+            ).scalar()
+            if not present:
+                continue
+            connection.execute(text(f"DELETE FROM {table} WHERE bucket >= :start AND bucket < :end"), bounds)
+            result = connection.execute(
+                text(f"INSERT INTO {table} (currency, source, bucket, open, high, low, close, count, first_ts, last_ts, mean, m2) {select_sql}"),
+                bounds,
+            )
+            counts[resolution] += result.rowcount
+    return counts
+
+
+def rebuild_range(start: date, end: date, chunk_days: int = 7):
+    """
+    rebuild() по дням пачками по chunk_days — каждая пачка в своей транзакции.
+    """
+    day = start
+    while day < end:
+        until = min(day + timedelta(days=chunk_days), end)
+        with engine.begin() as connection:
+            counts = rebuild(connection, day, until)
+        print(f"🕯️ {day} — {until}: {counts}")
+        day = until
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Пересчёт свечей OHLC за диапазон дат")
+    arg_parser.add_argument("--start", required=True, type=date.fromisoformat, help="первый день, ГГГГ-ММ-ДД")
+    arg_parser.add_argument("--end", required=True, type=date.fromisoformat, help="день после последнего, ГГГГ-ММ-ДД")
+    arg_parser.add_argument("--chunk-days", type=int, default=7, help="дней в одной транзакции")
+    args = arg_parser.parse_args()
+
+    started = time.perf_counter()
+    rebuild_range(args.start, args.end, args.chunk_days)
+    print(f"✅ Свечи пересчитаны за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import json
+from dataclasses import dataclass
+from app.parsing.config import SCRAPER_SOURCES_FILE
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    Описание источника цен. Парсер работает только по этим полям,
+    поэтому новый сайт добавляется записью в реестре, без нового кода.
+    """
+    name: str  # ключ источника: в данных, API и f"{name}_price"
+    title: str  # имя для ответов API ("VBR", "Investing", ...)
+    url: str
+    rows: str  # строки таблицы цен на всей странице
+    symbol: str  # ячейка с тикером внутри строки
+    price: str  # ячейка с ценой внутри строки
+    table_rows: str = "table tbody tr"  # строки внутри вырезанной таблицы (PARSER_TARGETED=1)
+    number_format: str = "ru"  # "ru": запятая — дробная часть; "en": запятая — разделитель тысяч
+    symbol_first_word: bool = False  # тикер — первое слово ячейки ("BTC Bitcoin" -> "BTC")
+    symbol_strip: bool = False  # обрезать пробелы у каждого текстового куска ячейки тикера и склеить их
+    page_url: str = None  # шаблон URL следующих страниц листинга, например "https://site/crypto/?page={page}"
+    pages: int = 1  # сколько страниц листинга читать (первая — url, остальные — page_url)
+
+    def page_urls(self) -> list:
+        if not self.page_url:
+            return [self.url]
+        return [self.url] + [self.page_url.format(page=page) for page in range(2, self.pages + 1)]
+
+
+DEFAULT_SOURCES = [
+    SourceSpec(
+        name="vbr",
+        title="VBR",
+        url="https://www.vbr.ru/crypto/",
+        rows="table tbody tr",
+        symbol="td:nth-child(1) span",
+        price="td:nth-child(3) div",
+    ),
+    SourceSpec(
+        name="investing",
+        title="Investing",
+        url="https://ru.investing.com/crypto",
+        rows="div:nth-of-type(5) > div > div:nth-of-type(2) > div:nth-of-type(1) > table > tbody > tr",
+        table_rows="table > tbody > tr",
+        symbol="td:nth-of-type(3)",
+        price="td:nth-of-type(4) > span",
+        symbol_strip=True,  # как get_text(strip=True) в прежнем парсере Investing
+    ),
+    SourceSpec(
+        name="bitinfo",
+        title="BitInfo",
+        url="https://bitinfocharts.com/ru/crypto-kurs/",
+        rows="table tbody tr",
+        symbol="td:nth-of-type(1)",
+        price="td:nth-of-type(2) a",
+        number_format="en",
+        symbol_first_word=True,
+    ),
+]
+
+
+def load_sources(path: str = None) -> list:
+    """
+    Реестр источников. Если задан SCRAPER_SOURCES_FILE, источники читаются
+    из JSON-списка объектов с полями SourceSpec, иначе берутся встроенные.
+    """
+    path = path or SCRAPER_SOURCES_FILE
+    if not path:
+        return list(DEFAULT_SOURCES)
+    with open(path, encoding="utf-8") as f:
+        return [SourceSpec(**item) for item in json.load(f)]
+
+
+SOURCES = load_sources()
+SOURCES_BY_NAME = {source.name: source for source in SOURCES}
+SOURCES_BY_TITLE = {source.title: source for source in SOURCES}
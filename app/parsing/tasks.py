@@ -1,26 +1,144 @@
 from celery import shared_task
+from celery.signals import worker_ready, worker_shutdown
 from app.parsing.parsing import CryptoScraper, CryptoDataProcessor
 from app.parsing.pars_in_db import DatabaseManager
+from app.parsing.buffer import TickBuffer
+from app.parsing.last_values import LastValueCache
+from app.db.partitions import TICK_PARTITIONS
+from app.parsing.rollups import OHLC_PARTITIONS
+from app.parsing.retention import enforce_retention
+from app.db.session import engine
+from app.db.config import APP_ROLE, WORKER_METRICS_PORT
+from app.db.metrics import pool_stats, serve_prometheus
+from app.service.price_snapshot import PriceSnapshot
+from app.service.pubsub import get_pubsub, PRICES_CHANNEL
+import time
+
+# Один парсер на процесс воркера: пул соединений и ETag/Last-Modified
+# сохраняются между запусками задачи
+scraper = CryptoScraper()
+processor = CryptoDataProcessor(scraper)
+# Тики копятся в памяти процесса и пишутся в БД пачками (см. TickBuffer);
+# неизменившиеся цены не перезаписывают prices (см. LastValueCache)
+last_values = LastValueCache()
+tick_buffer = TickBuffer(DatabaseManager(), last_values=last_values)
+
+
+@worker_shutdown.connect
+def close_scraper(**kwargs):
+    scraper.close()
+    # Не теряем накопленное при остановке: что не запишется в БД, уйдёт в спул
+    tick_buffer.flush()
+
+
+@worker_ready.connect
+def prepare_partitions(**kwargs):
+    ensure_tick_partitions()
+    try:
+        print(f"🧊 Кэш последних цен: {last_values.warm(tick_buffer.db_manager)} записей")
+    except Exception as e:
+        # Без прогрева кэш заполнится первым циклом — он запишется целиком
+        print(f"❌ Ошибка прогрева кэша последних цен: {e}")
+    if WORKER_METRICS_PORT:
+        # Воркер запущен с --pool=solo/threads, так что пул этого процесса — тот, которым пишут задачи
+        try:
+            serve_prometheus({"sync": engine}, APP_ROLE, WORKER_METRICS_PORT)
+            print(f"📈 Метрики пула БД: http://0.0.0.0:{WORKER_METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"❌ Не удалось открыть порт метрик {WORKER_METRICS_PORT}: {e}")
+
+
+def publish_price_snapshot() -> int:
+    """
+    Публикует срез последних цен для процессов API (см. app/api/snapshot.py).
+    Берётся из кэша последних значений: он прогрет из prices и обновляется каждым циклом,
+    поэтому срез не ждёт сброса буфера тиков в БД.
+    """
+    prices = {}
+    for (source, currency), (price, _) in last_values.values.items():
+        prices.setdefault(currency, {})[source] = price
+    snapshot = PriceSnapshot(time.time_ns(), time.time(), prices)
+    return get_pubsub().publish(PRICES_CHANNEL, snapshot.to_message())
+
 
 @shared_task
-def update_crypto_prices():
-    scraper = CryptoScraper()
-    processor = CryptoDataProcessor(scraper)
-    db_manager = DatabaseManager()
+def ensure_tick_partitions():
+    """
+    Создаёт секции price_ticks на TICK_PARTITIONS_AHEAD дней вперёд
+    и секции минутных свечей на два месяца вперёд.
+    """
+    try:
+        created = []
+        for partitions in (TICK_PARTITIONS, OHLC_PARTITIONS):
+            # Сбрасываем кэш процесса: проверяем БД, даже если секции уже создавались
+            partitions.ready_until = None
+            with engine.begin() as connection:
+                created += partitions.ensure(connection)
+            print(f"🗂️ Секции {partitions.table} готовы до {partitions.ready_until}")
+        print(f"🗂️ Созданы секции: {created}")
+        return created
+    except Exception as e:
+        print(f"❌ Ошибка в ensure_tick_partitions: {e}")
+        return str(e)
+
 
+@shared_task
+def update_crypto_prices():
     try:
         prices = processor.get_crypto_prices()
         print(f"🔥 Полученные цены: {prices}")  # Проверяем, что данные приходят
+        print(f"🌐 Соединения: {scraper.stats}")
+        print(f"⏱️ Задержки источников: {scraper.latency_report()}")
+        if scraper.parse_pool is not None:
+            print(f"🧵 Конвейер разбора: {scraper.parse_pool.report()}")
 
         if not prices:
             print("⚠️ Данные не получены!")
             return "No data"
 
-        # Предобрабатываем данные и записываем в БД
-        prices = db_manager.preprocess_prices(prices)
-        db_manager.import_data_to_db(prices)
-        
+        # Цены уже нормализованы парсером в числа; в БД они попадут при сбросе буфера
+        flushed = tick_buffer.add(prices)
+        print(f"📥 Буфер тиков: {tick_buffer.report()}{' (сброшен)' if flushed else ''}")
+        print(f"✂️ Перезапись prices только при изменении: {last_values.report()}")
+        print(f"🏊 Пул БД: {pool_stats(engine)}")
+        try:
+            print(f"📣 Срез цен опубликован, подписчиков: {publish_price_snapshot()}")
+        except Exception as e:
+            # API без публикаций перечитает цены из БД, когда срез устареет
+            print(f"❌ Ошибка публикации среза цен: {e}")
+
         return prices  # Celery сохранит результат
     except Exception as e:
         print(f"❌ Ошибка в update_crypto_prices: {e}")
         return str(e)
+
+
+@shared_task
+def flush_tick_buffer():
+    """
+    Сброс буфера по времени, если новых тиков давно не было, плюс досылка спула.
+    """
+    try:
+        tick_buffer.flush_if_due()
+        return tick_buffer.report()
+    except Exception as e:
+        print(f"❌ Ошибка в flush_tick_buffer: {e}")
+        return str(e)
+
+
+@shared_task
+def enforce_price_retention():
+    """
+    Удаляет истёкшие секции тиков и минутных свечей (см. app/parsing/retention.py).
+    """
+    try:
+        report = enforce_retention()
+        print(
+            f"🧹 Хранение: удалено {len(report['dropped'])} секций, "
+            f"освобождено {report['reclaimed_bytes'] / 1024 / 1024:.1f} МБ за {report['seconds']} с, "
+            f"пропущено без покрытия свечами: {report['skipped']}"
+        )
+        return report
+    except Exception as e:
+        print(f"❌ Ошибка в enforce_price_retention: {e}")
+        return str(e)
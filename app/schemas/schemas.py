@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -24,4 +25,12 @@ class ConvertRequest(BaseModel):
     to_currency: str
     source: str
     amount: float
-   
\ No newline at end of file
+   
+class ConvertItem(BaseModel):
+    from_currency: str
+    to_currency: str
+    amount: float
+
+class ConvertBatchRequest(BaseModel):
+    source: str
+    items: List[ConvertItem] = Field(..., min_length=1, max_length=10000)  # не больше 10 000 конверсий за запрос
@@ -0,0 +1,51 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right
+
+
+class PriceIndex:
+    """
+    Последние цены, отсортированные по (цена, источник, валюта) — целиком и по каждому источнику.
+    Поиск диапазона цен — двоичный (bisect), поэтому время ответа зависит от размера
+    страницы, а не от числа цен. Строится один раз на версию среза цен.
+    """
+    def __init__(self, prices: dict):
+        rows = sorted(
+            (price, source, currency)
+            for currency, by_source in prices.items()
+            for source, price in by_source.items()
+            if price is not None
+        )
+        self.rows = {None: rows}
+        for row in rows:
+            self.rows.setdefault(row[1], []).append(row)
+        # Параллельные списки цен — для bisect по границам диапазона
+        self.prices = {source: [row[0] for row in source_rows] for source, source_rows in self.rows.items()}
+
+    def page(self, min_price: float, max_price: float, source: str = None, after: tuple = None, limit: int = 100) -> tuple:
+        """
+        Страница цен из [min_price, max_price] по возрастанию; after — ключ последней строки
+        предыдущей страницы (keyset). Возвращает (строки, есть ли следующая страница).
+        """
+        rows = self.rows.get(source, [])
+        prices = self.prices.get(source, [])
+        start = bisect_left(prices, min_price)
+        if after is not None:
+            start = max(start, bisect_right(rows, after))
+        end = bisect_right(prices, max_price)
+        return rows[start:min(start + limit, end)], start + limit < end
+
+
+def encode_cursor(row: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(row).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Курсор -> (цена, источник, валюта); ValueError, если курсор испорчен.
+    """
+    try:
+        price, source, currency = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(price), str(source), str(currency)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
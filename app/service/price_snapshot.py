@@ -0,0 +1,60 @@
+import json
+import time
+from types import MappingProxyType
+from app.service.rates import build_rates
+from app.service.price_index import PriceIndex
+# Срез цен и его сериализация отдельно от API: воркер собирает и публикует срез,
+# не создавая асинхронный движок БД процесса API (app/api/snapshot.py)
+
+
+class PriceSnapshot:
+    """
+    Неизменяемый срез последних цен {ВАЛЮТА: {источник: цена}} с номером версии
+    (воркер берёт time.time_ns(), версии растут и после его рестарта)
+    и временем публикации (unix-время). Новые цены — новый объект, старый не меняется,
+    поэтому запрос, получивший срез, дочитывает его целиком без блокировок.
+    """
+    __slots__ = ("version", "published_at", "prices", "_rates", "_index")
+
+    def __init__(self, version: int, published_at: float, prices: dict):
+        self.version = version
+        self.published_at = published_at
+        self.prices = MappingProxyType({currency: MappingProxyType(dict(by_source)) for currency, by_source in prices.items()})
+        self._rates = None
+        self._index = None
+
+    def rates(self) -> dict:
+        """
+        Матрицы кросс-курсов по источникам (app/service/rates.py), одни на версию среза.
+        """
+        if self._rates is None:
+            self._rates = build_rates(self.prices)
+        return self._rates
+
+    def index(self) -> PriceIndex:
+        """
+        Цены, отсортированные для поиска по диапазону (app/service/price_index.py).
+        """
+        if self._index is None:
+            self._index = PriceIndex(self.prices)
+        return self._index
+
+    def prepare(self) -> "PriceSnapshot":
+        self.rates()
+        self.index()
+        return self
+
+    def age(self) -> float:
+        return time.time() - self.published_at
+
+    def to_message(self) -> str:
+        return json.dumps({
+            "version": self.version,
+            "published_at": self.published_at,
+            "prices": {currency: dict(by_source) for currency, by_source in self.prices.items()},
+        })
+
+    @classmethod
+    def from_message(cls, message) -> "PriceSnapshot":
+        data = json.loads(message)
+        return cls(data["version"], data["published_at"], data["prices"])
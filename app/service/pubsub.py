@@ -0,0 +1,75 @@
+import asyncio
+import os
+import dotenv
+
+dotenv.load_dotenv()
+
+# Канал публикации срезов последних цен: воркер публикует, процессы API слушают.
+# "local" — внутрипроцессная замена Redis (разработка, воркер и API в одном процессе)
+PUBSUB_URL = os.getenv("PUBSUB_URL", "redis://127.0.0.1:6379/0")
+PRICES_CHANNEL = os.getenv("PRICES_CHANNEL", "prices:snapshot")
+
+
+class RedisPubSub:
+    """
+    Публикация синхронным клиентом (из задач Celery), подписка — асинхронным (из FastAPI).
+    """
+    def __init__(self, url: str):
+        self.url = url
+        self.client = None
+
+    def publish(self, channel: str, message: str) -> int:
+        if self.client is None:
+            import redis
+            self.client = redis.Redis.from_url(self.url, socket_timeout=2, socket_connect_timeout=2)
+        return self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str):
+        import redis.asyncio
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class LocalPubSub:
+    """
+    Та же схема в пределах одного процесса: каждому подписчику своя очередь.
+    publish можно звать из любого потока.
+    """
+    def __init__(self):
+        self.subscribers = {}  # канал -> [(цикл событий, очередь)]
+
+    def publish(self, channel: str, message: str) -> int:
+        subscribers = list(self.subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+        return len(subscribers)
+
+    async def subscribe(self, channel: str):
+        subscriber = asyncio.get_running_loop(), asyncio.Queue()
+        self.subscribers.setdefault(channel, []).append(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            self.subscribers[channel].remove(subscriber)
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    """
+    Общий на процесс канал по PUBSUB_URL.
+    """
+    global _pubsub
+    if _pubsub is None:
+        _pubsub = LocalPubSub() if PUBSUB_URL == "local" else RedisPubSub(PUBSUB_URL)
+    return _pubsub
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class RateMatrix:
+    """
+    Кросс-курсы одного источника: matrix[i, j] = цена symbols[i] / цена symbols[j],
+    то есть сколько единиц symbols[j] дают за одну symbols[i].
+    Строится один раз на версию среза цен, дальше только читается.
+    Плотная матрица N×N: при 1000 валют это 8 МБ на источник.
+    """
+    def __init__(self, prices: dict):
+        # Без цены или с нулевой ценой курс не определён
+        self.symbols = sorted(currency for currency, price in prices.items() if price)
+        self.index = {symbol: position for position, symbol in enumerate(self.symbols)}
+        self.prices = np.array([prices[symbol] for symbol in self.symbols], dtype=np.float64)
+        self.matrix = self.prices[:, None] / self.prices[None, :]
+        self.matrix.setflags(write=False)
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Курс пары; KeyError, если у источника нет одной из валют.
+        """
+        return float(self.matrix[self.index[from_currency], self.index[to_currency]])
+
+    def submatrix(self, symbols: list = None) -> tuple:
+        """
+        Курсы между указанными валютами (все, если symbols не задан): (валюты, матрица).
+        Валюты, которых нет у источника, пропускаются.
+        """
+        if symbols is None:
+            return self.symbols, self.matrix
+        present = [symbol for symbol in symbols if symbol in self.index]
+        positions = np.array([self.index[symbol] for symbol in present], dtype=np.intp)
+        return present, self.matrix[np.ix_(positions, positions)]
+
+    def convert_many(self, from_currencies: list, to_currencies: list, amounts) -> tuple:
+        """
+        Пакетная конверсия одной векторной операцией.
+        Возвращает (курсы, суммы) — массивы float64, NaN там, где у источника нет валюты.
+        """
+        rows = np.array([self.index.get(symbol, -1) for symbol in from_currencies], dtype=np.intp)
+        columns = np.array([self.index.get(symbol, -1) for symbol in to_currencies], dtype=np.intp)
+        found = (rows >= 0) & (columns >= 0)
+        rates = np.full(len(rows), np.nan)
+        rates[found] = self.matrix[rows[found], columns[found]]
+        return rates, np.asarray(amounts, dtype=np.float64) * rates
+
+
+def build_rates(prices: dict) -> dict:
+    """
+    {ВАЛЮТА: {источник: цена}} -> {источник: RateMatrix}.
+    """
+    by_source = {}
+    for currency, sources in prices.items():
+        for source, price in sources.items():
+            by_source.setdefault(source, {})[currency] = price
+    return {source: RateMatrix(source_prices) for source, source_prices in by_source.items()}
@@ -0,0 +1,51 @@
+import math
+
+
+class RunningStats:
+    """
+    Минимум, максимум, среднее и разброс, собранные из готовых агрегатов без исходных цен:
+    свечи и источники сливаются по Чану (сами свечи считаются по Уэлфорду при записи,
+    см. app/parsing/rollups.py). m2 — сумма квадратов отклонений от среднего.
+    """
+    __slots__ = ("count", "mean", "m2", "min", "max", "last", "last_ts")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = None
+        self.last_ts = None
+
+    def merge(self, count: int, mean: float, m2: float, low: float, high: float, last: float = None, last_ts=None):
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        self.observe_last(last, last_ts)
+
+    def merge_stats(self, other: "RunningStats"):
+        self.merge(other.count, other.mean, other.m2, other.min, other.max, other.last, other.last_ts)
+
+    def observe_last(self, price, moment):
+        if price is not None and (self.last_ts is None or (moment is not None and moment >= self.last_ts)):
+            self.last, self.last_ts = price, moment
+
+    def as_dict(self) -> dict:
+        if not self.count:
+            return {"count": 0, "min": None, "max": None, "mean": None, "stddev": None, "last": None}
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": round(self.mean, 8),
+            # Стандартное отклонение по всем ценам окна (генеральное)
+            "stddev": round(math.sqrt(max(self.m2, 0.0) / self.count), 8),
+            "last": self.last,
+        }
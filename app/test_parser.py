@@ -1,8 +1,10 @@
-from app.parsing.parsing import CryptoScraper
+from app.parsing.parsing import CryptoScraper, CryptoDataProcessor
 
 scraper = CryptoScraper()
-data = scraper.scrape()
+data = CryptoDataProcessor(scraper).get_crypto_prices()
 print(f"Полученные данные: {data}")
 
 # celery -A app.celery_app worker --loglevel=info --pool=solo
 # celery -A app.celery_app beat --loglevel=info
+# Проверка без сети: python -m app.parsing.replay record fixtures/ (один раз),
+# затем python -m app.benchmarks.scraper fixtures/
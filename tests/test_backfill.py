@@ -0,0 +1,65 @@
+from datetime import datetime
+import pytest
+from app.parsing.backfill import COLUMNS, Backfill, normalize_price, parse_timestamp, read_records
+
+
+@pytest.mark.parametrize("value", ["1706702400", "1706702400.0", 1706702400, "2024-01-31T12:00:00Z", "2024-01-31 15:00:00+03:00"])
+def test_parse_timestamp(value):
+    assert parse_timestamp(value) == datetime(2024, 1, 31, 12)
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "1e999", float("inf"), "not a date"])
+def test_parse_timestamp_rejects(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("42.5", 42.5),
+    ("1 234,56 $", 1234.56),
+    ("nan", None),
+    ("inf", None),
+    ("-inf", None),
+    ("1e400", None),
+    (float("nan"), None),
+    ("abc", None),
+])
+def test_normalize_price(value, expected):
+    assert normalize_price(value, "vbr") == expected
+
+
+def test_convert_rejects_bad_rows():
+    backfill = Backfill("history.csv")
+    lines = [
+        "vbr,btc,100.5,1706702400\n",
+        "vbr,btc,nan,1706702400\n",
+        "vbr,eth,inf,2024-01-31T12:00:00Z\n",
+        "vbr,eth,3,nan\n",
+    ]
+    buffer, count, first, last = backfill.convert(read_records(lines, "csv", list(COLUMNS)))
+    assert count == 1
+    assert backfill.stats["rejected"] == 3
+    assert buffer.getvalue().strip() == "vbr,BTC,100.5,2024-01-31 12:00:00"
+    assert first == last == datetime(2024, 1, 31, 12)
+
+
+def test_convert_rejects_bad_jsonl_lines():
+    backfill = Backfill("history.jsonl")
+    lines = [
+        '{"source": "vbr", "currency": "btc", "price": 100.5, "timestamp": 1706702400}\n',
+        '{"source": "vbr", "currency": "eth", "price": 3\n',
+        "[1, 2]\n",
+        "5\n",
+        "\n",
+        '{"source": "vbr", "currency": 42, "price": 1, "timestamp": "2024-01-31T12:00:00Z"}\n',
+        '{"source": "vbr", "currency": null, "price": 1, "timestamp": 1706702400}\n',
+        '{"source": "vbr", "currency": "eth", "price": "2,5", "timestamp": "1706702400"}\n',
+    ]
+    buffer, count, first, last = backfill.convert(read_records(lines, "jsonl", None))
+    assert count == 3
+    assert backfill.stats["rejected"] == 4
+    assert buffer.getvalue().splitlines() == [
+        "vbr,BTC,100.5,2024-01-31 12:00:00",
+        "vbr,42,1.0,2024-01-31 12:00:00",
+        "vbr,ETH,2.5,2024-01-31 12:00:00",
+    ]
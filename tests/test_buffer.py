@@ -0,0 +1,116 @@
+from datetime import datetime
+import pytest
+from app.parsing.buffer import TickBuffer
+from app.parsing.last_values import LastValueCache
+
+
+class FakeDatabase:
+    """
+    write_ticks, которую можно «уронить»: fail_after — сколько пачек записать до сбоя.
+    """
+    def __init__(self):
+        self.batches = []
+        self.fail_after = None
+
+    def write_ticks(self, ticks: list):
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                raise ConnectionError("database is down")
+            self.fail_after -= 1
+        self.batches.append([dict(tick) for tick in ticks])
+
+    def written(self) -> list:
+        return [(tick["currency"], tick["price"]) for batch in self.batches for tick in batch]
+
+
+def rows(*prices) -> list:
+    return [{"currency": f"c{index}", "vbr_price": price} for index, price in enumerate(prices)]
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return str(tmp_path / "ticks.jsonl")
+
+
+def test_flushes_by_size(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=3, flush_interval=3600, spool_path=spool_path)
+    assert not buffer.add(rows(1.0, 2.0))
+    assert database.batches == []
+    assert buffer.add(rows(3.0))
+    assert database.written() == [("C0", 1.0), ("C1", 2.0), ("C0", 3.0)]
+    assert buffer.report()["buffered"] == 0
+
+
+def test_flushes_by_age(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=100, flush_interval=0, spool_path=spool_path)
+    assert buffer.add(rows(1.0))
+    assert database.written() == [("C0", 1.0)]
+
+
+def test_failed_flush_is_spooled_and_replayed(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=2, flush_interval=3600, spool_path=spool_path)
+    buffer.add(rows(1.0), datetime(2024, 1, 31, 12))
+    database.fail_after = 0
+    buffer.add(rows(2.0, 3.0), datetime(2024, 1, 31, 12, 1))
+    # Ни одна пачка не записана — все три тика в спуле, буфер пуст
+    assert database.batches == []
+    assert buffer.stats["spooled"] == 3
+    assert buffer.report()["buffered"] == 0
+    assert buffer.due()
+
+    database.fail_after = None
+    buffer.add(rows(4.0), datetime(2024, 1, 31, 12, 2))
+    buffer.flush()
+    # Сначала спул (с исходным временем тиков), затем новые тики
+    assert database.written() == [("C0", 1.0), ("C0", 2.0), ("C1", 3.0), ("C0", 4.0)]
+    assert database.batches[0][0]["timestamp"] == datetime(2024, 1, 31, 12)
+    assert buffer.stats["replayed"] == 3
+    assert not buffer.due()
+
+
+def test_partial_failure_spools_only_unwritten(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=2, flush_interval=3600, spool_path=spool_path)
+    database.fail_after = 1
+    buffer.add(rows(1.0, 2.0, 3.0, 4.0, 5.0))
+    assert database.written() == [("C0", 1.0), ("C1", 2.0)]
+    assert buffer.stats["spooled"] == 3
+
+    database.fail_after = None
+    buffer.flush()
+    assert database.written() == [("C0", 1.0), ("C1", 2.0), ("C2", 3.0), ("C3", 4.0), ("C4", 5.0)]
+
+
+def test_interrupted_replay_keeps_only_the_rest(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=2, flush_interval=3600, spool_path=spool_path)
+    buffer.spool([
+        {"source": "vbr", "currency": f"C{index}", "price": float(index), "timestamp": datetime(2024, 1, 31, 12)}
+        for index in range(5)
+    ])
+    database.fail_after = 1
+    with pytest.raises(ConnectionError):
+        buffer.replay_spool()
+    with open(spool_path, encoding="utf-8") as spool_file:
+        assert len(spool_file.readlines()) == 3
+
+    database.fail_after = None
+    buffer.replay_spool()
+    assert database.written() == [("C0", 0.0), ("C1", 1.0), ("C2", 2.0), ("C3", 3.0), ("C4", 4.0)]
+    assert not buffer.due()
+
+
+def test_spool_keeps_changed_flag(spool_path):
+    database = FakeDatabase()
+    buffer = TickBuffer(database, flush_rows=10, flush_interval=3600, spool_path=spool_path, last_values=LastValueCache(epsilon=0))
+    moment = datetime(2024, 1, 31, 12)
+    buffer.add(rows(1.0), moment)
+    buffer.add(rows(1.0), moment)
+    database.fail_after = 0
+    buffer.flush()
+    database.fail_after = None
+    buffer.flush()
+    assert [tick["changed"] for tick in database.batches[0]] == [True, False]
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from app.parsing.last_values import LastValueCache
+
+START = datetime(2024, 1, 31, 12)
+
+
+def tick(price: float, minutes: float = 0, currency: str = "BTC", source: str = "vbr") -> dict:
+    return {"source": source, "currency": currency, "price": price, "timestamp": START + timedelta(minutes=minutes)}
+
+
+def test_first_tick_is_changed():
+    cache = LastValueCache(epsilon=0.001, heartbeat=3600)
+    ticks = [tick(100.0), tick(100.0, currency="ETH"), tick(100.0, source="bitinfo")]
+    assert cache.mark(ticks) == 3
+    assert all(item["changed"] for item in ticks)
+
+
+def test_move_within_epsilon_is_skipped():
+    cache = LastValueCache(epsilon=0.001, heartbeat=3600)
+    cache.mark([tick(100.0)])
+    ticks = [tick(100.05, 1), tick(100.2, 2), tick(100.25, 3)]
+    assert cache.mark(ticks) == 1
+    # Сравнение — с последней записанной ценой, а не с предыдущим тиком
+    assert [item["changed"] for item in ticks] == [False, True, False]
+    assert cache.values["vbr", "BTC"] == (100.2, START + timedelta(minutes=2))
+
+
+def test_exact_comparison_without_epsilon():
+    cache = LastValueCache(epsilon=0, heartbeat=3600)
+    ticks = [tick(1.0), tick(1.0, 1), tick(1.0000001, 2)]
+    cache.mark(ticks)
+    assert [item["changed"] for item in ticks] == [True, False, True]
+
+
+def test_heartbeat_rewrites_unchanged_price():
+    cache = LastValueCache(epsilon=0.001, heartbeat=600)
+    ticks = [tick(100.0), tick(100.0, 9), tick(100.0, 10), tick(100.0, 15)]
+    cache.mark(ticks)
+    assert [item["changed"] for item in ticks] == [True, False, True, False]
+    assert cache.stats["heartbeats"] == 1
+
+
+def test_report():
+    cache = LastValueCache(epsilon=0.001, heartbeat=3600)
+    cache.mark([tick(100.0), tick(100.0, 1), tick(100.0, 2), tick(200.0, 3)])
+    assert cache.report() == {"seen": 4, "written": 2, "skipped": 2, "heartbeats": 0, "reduction": 0.5}
@@ -0,0 +1,73 @@
+import random
+import pytest
+from app.parsing.normalize import parse_price, parse_prices
+
+# Пробелы, которыми сайты группируют разряды: обычный, NBSP, узкий NBSP
+SPACES = (" ", " ", " ")
+
+
+def format_price(rng: random.Random, value: float, decimals: int, style: str) -> str:
+    """
+    Печатает число так, как его показывают сайты: с группировкой тысяч,
+    NBSP, дробной запятой и символом валюты.
+    """
+    text = f"{value:,.{decimals}f}"
+    if style == "en":
+        return rng.choice(["{}", "${}", "{} USD", "$ {}"]).format(text)
+    grouping = rng.choice([*SPACES, "."])
+    text = text.replace(",", "\0").replace(".", ",").replace("\0", grouping)
+    return rng.choice(["{}", "{} $", "{} ₽", "{} USD"]).format(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(seed):
+    # Свойство: любое число в любом оформлении своего формата разбирается в то же число
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(20_000):
+        style = rng.choice(["ru", "en"])
+        decimals = rng.randint(0, 8)
+        value = round(rng.uniform(0, 10 ** rng.randint(0, 9)), decimals)
+        text = format_price(rng, value, decimals, style)
+        expected = float(f"{value:.{decimals}f}")
+        if parse_price(text, style) != expected:
+            failures.append((style, text, expected))
+    assert not failures, failures[:10]
+
+
+@pytest.mark.parametrize("text, number_format, expected", [
+    ("1 234,56 $", "ru", 1234.56),
+    ("1 234,56 ₽", "ru", 1234.56),
+    ("1 234 567,5", "ru", 1234567.5),
+    ("1.234,56", "ru", 1234.56),
+    ("0,00012 ₽", "ru", 0.00012),
+    ("$1,234.56 USD", "en", 1234.56),
+    ("12,345,678", "en", 12345678.0),
+    ("12'345.6", "en", 12345.6),
+    ("1.234.567", "en", 1234567.0),
+    ("0.123", "ru", 0.123),
+    ("1000.50", "ru", 1000.5),
+    ("1,234", "ru", 1.234),
+    ("1,234", "en", 1234.0),
+    ("1.234", "en", 1.234),
+    ("-5 $", "ru", -5.0),
+    ("−5,5", "ru", -5.5),
+    ("42.", "en", 42.0),
+])
+def test_explicit_cases(text, number_format, expected):
+    assert parse_price(text, number_format) == expected
+
+
+def test_ru_single_dot_grouping():
+    # Изменение поведения: прежняя цепочка давала 1.234, теперь точка с тремя цифрами
+    # в формате ru — разделитель тысяч, как "1.234,56"
+    assert parse_price("1.234", "ru") == 1234.0
+
+
+@pytest.mark.parametrize("text", ["", "—", "n/a", "USD"])
+def test_no_number(text):
+    assert parse_price(text) is None
+
+
+def test_parse_prices_drops_rows_without_number():
+    assert parse_prices({"BTC": "1 234,5 $", "ETH": "—"}) == {"BTC": 1234.5}
@@ -0,0 +1,24 @@
+import pytest
+from app.parsing.engines import ENGINES
+from app.parsing.parsing import CryptoScraper
+from app.parsing.sources import SOURCES_BY_NAME
+
+# Ячейка тикера с вложенными тегами и пробелами между ними
+INVESTING = (
+    "<table><tbody><tr><td>1</td><td></td>"
+    "<td>\n  <a>BTC</a>\n  <span> </span></td><td><span>60.000,5</span></td>"
+    "</tr></tbody></table>"
+)
+BITINFO = "<table><tbody><tr><td>BTC <span>Bitcoin</span></td><td><a>61,000.5</a></td></tr></tbody></table>"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source, html, expected", [
+    ("investing", INVESTING, {"BTC": 60000.5}),
+    ("bitinfo", BITINFO, {"BTC": 61000.5}),
+])
+def test_symbol_text_same_for_every_engine(engine, source, html, expected):
+    scraper = CryptoScraper(engine=engine, targeted=False)
+    spec = SOURCES_BY_NAME[source]
+    rows = scraper.engine.select(scraper.engine.parse(html), "table tbody tr")
+    assert scraper.parse_rows(spec, rows) == expected
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.parsing import pipeline
+from app.parsing.pipeline import ParsePool
+from app.parsing.sources import SOURCES
+
+
+def test_backpressure_limits_pages_in_flight(monkeypatch):
+    release = threading.Event()
+    running = []
+    lock = threading.Lock()
+
+    def parse_page(source, html, engine, targeted, submitted_at):
+        with lock:
+            running.append(html)
+        release.wait(5)
+        return {"page": html}, time.time(), 0.01
+
+    monkeypatch.setattr(pipeline, "parse_page", parse_page)
+
+    async def run():
+        pool = ParsePool(workers=8, queue_size=2)
+        # Потоки вместо процессов: проверяется ограничение очереди, а не сам разбор
+        pool.executor = ThreadPoolExecutor(max_workers=8)
+        pool.slots = asyncio.Semaphore(pool.queue_size)
+        tasks = [asyncio.create_task(pool.parse(SOURCES[0], f"page-{index}", "lxml", False)) for index in range(5)]
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+        # Остальные три страницы ждут места, а не копятся в пуле
+        assert len(running) == 2
+        assert pool.depth == 2
+        release.set()
+        results = await asyncio.gather(*tasks)
+        pool.close()
+        return pool, results
+
+    pool, results = asyncio.run(run())
+    assert [result["page"] for result in results] == [f"page-{index}" for index in range(5)]
+    assert pool.max_depth == 2
+    report = pool.report()
+    assert report["parse_queue_depth"] == 0
+    assert report["parse_queue_max_depth"] == 2
+    assert pool.timings["backpressure"][1] == pool.timings["parse"][1] == 5
+    assert report["fetch_ms"] is None
+
+
+def test_parse_page_reuses_parser_per_engine():
+    html = "<table><tbody><tr><td><span>BTC</span></td><td></td><td><div>1 234,5</div></td></tr></tbody></table>"
+    data, started_at, seconds = pipeline.parse_page(SOURCES[0], html, "html.parser", False, time.time())
+    assert data == {"BTC": 1234.5}
+    assert seconds >= 0
+    parser = pipeline._parsers["html.parser", False]
+    pipeline.parse_page(SOURCES[0], html, "html.parser", False, time.time())
+    assert pipeline._parsers["html.parser", False] is parser
@@ -0,0 +1,93 @@
+import pytest
+from app.service.price_index import PriceIndex, decode_cursor, encode_cursor
+
+PRICES = {
+    "BTC": {"vbr": 60000.0, "bitinfo": 61000.0},
+    "ETH": {"vbr": 3000.0, "bitinfo": 3000.0},
+    "USDT": {"vbr": 1.0, "bitinfo": None},
+    "USDC": {"vbr": 1.0},
+    "DOGE": {"bitinfo": 0.1},
+}
+
+
+def pages(index: PriceIndex, min_price: float, max_price: float, source: str = None, limit: int = 2) -> list:
+    """
+    Все страницы подряд, курсор — через encode/decode, как в API.
+    """
+    result, after = [], None
+    while True:
+        rows, more = index.page(min_price, max_price, source, after, limit)
+        result.append(rows)
+        if not more:
+            return result
+        after = decode_cursor(encode_cursor(rows[-1]))
+
+
+def test_sorted_by_price_source_currency():
+    rows, more = PriceIndex(PRICES).page(0, 100000, limit=100)
+    assert rows == [
+        (0.1, "bitinfo", "DOGE"),
+        (1.0, "vbr", "USDC"),
+        (1.0, "vbr", "USDT"),
+        (3000.0, "bitinfo", "ETH"),
+        (3000.0, "vbr", "ETH"),
+        (60000.0, "vbr", "BTC"),
+        (61000.0, "bitinfo", "BTC"),
+    ]
+    assert not more
+
+
+def test_inclusive_bounds():
+    rows, _ = PriceIndex(PRICES).page(1.0, 3000.0, limit=100)
+    assert [row[0] for row in rows] == [1.0, 1.0, 3000.0, 3000.0]
+
+
+def test_keyset_pages_cover_range_once():
+    index = PriceIndex(PRICES)
+    result = pages(index, 0, 100000, limit=2)
+    assert [len(rows) for rows in result] == [2, 2, 2, 1]
+    flat = [row for rows in result for row in rows]
+    assert flat == index.page(0, 100000, limit=100)[0]
+
+
+def test_cursor_between_equal_prices():
+    # Граница страницы внутри одинаковых цен: следующая страница продолжается со следующей валюты
+    index = PriceIndex(PRICES)
+    first, more = index.page(1.0, 1.0, limit=1)
+    assert first == [(1.0, "vbr", "USDC")] and more
+    second, more = index.page(1.0, 1.0, after=first[-1], limit=1)
+    assert second == [(1.0, "vbr", "USDT")]
+    assert not more
+
+
+def test_exact_last_page_has_no_next():
+    index = PriceIndex(PRICES)
+    # Четыре цены в диапазоне, страницы по два: вторая страница последняя
+    first, more = index.page(1.0, 3000.0, limit=2)
+    assert more
+    second, more = index.page(1.0, 3000.0, after=first[-1], limit=2)
+    assert len(second) == 2
+    assert not more
+    rows, more = index.page(1.0, 3000.0, limit=4)
+    assert len(rows) == 4 and not more
+
+
+def test_source_filter():
+    index = PriceIndex(PRICES)
+    assert [len(rows) for rows in pages(index, 0, 100000, "bitinfo", limit=1)] == [1, 1, 1]
+    assert index.page(0, 100000, "investing") == ([], False)
+
+
+def test_empty_range():
+    assert PriceIndex(PRICES).page(10.0, 20.0) == ([], False)
+
+
+def test_cursor_round_trip():
+    row = (3000.0, "vbr", "ETH")
+    assert decode_cursor(encode_cursor(row)) == row
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor((1.0, "vbr")), "W10="])
+def test_bad_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,67 @@
+import math
+import numpy as np
+import pytest
+from app.service.rates import RateMatrix, build_rates
+
+PRICES = {
+    "BTC": {"vbr": 60000.0, "bitinfo": 61000.0},
+    "ETH": {"vbr": 3000.0, "bitinfo": 3050.0},
+    "USDT": {"vbr": 1.0},
+    "DEAD": {"vbr": 0.0, "bitinfo": None},
+}
+
+
+@pytest.fixture
+def vbr():
+    return build_rates(PRICES)["vbr"]
+
+
+def test_build_rates_splits_by_source():
+    rates = build_rates(PRICES)
+    assert sorted(rates) == ["bitinfo", "vbr"]
+    assert rates["bitinfo"].symbols == ["BTC", "ETH"]
+
+
+def test_cross_rates(vbr):
+    assert vbr.symbols == ["BTC", "ETH", "USDT"]
+    assert vbr.rate("BTC", "ETH") == 20.0
+    assert vbr.rate("ETH", "BTC") == pytest.approx(0.05)
+    assert vbr.rate("BTC", "BTC") == 1.0
+    # Через промежуточную валюту — тот же курс
+    assert vbr.rate("BTC", "USDT") * vbr.rate("USDT", "ETH") == pytest.approx(vbr.rate("BTC", "ETH"))
+
+
+def test_missing_or_zero_price_has_no_rate(vbr):
+    with pytest.raises(KeyError):
+        vbr.rate("DEAD", "BTC")
+    with pytest.raises(KeyError):
+        vbr.rate("BTC", "DOGE")
+
+
+def test_matrix_is_read_only(vbr):
+    with pytest.raises(ValueError):
+        vbr.matrix[0, 0] = 2.0
+
+
+def test_submatrix(vbr):
+    symbols, matrix = vbr.submatrix(["USDT", "DOGE", "BTC"])
+    assert symbols == ["USDT", "BTC"]
+    assert matrix.tolist() == [[1.0, 1 / 60000], [60000.0, 1.0]]
+    symbols, matrix = vbr.submatrix()
+    assert symbols == vbr.symbols and matrix.shape == (3, 3)
+
+
+def test_convert_many(vbr):
+    rates, amounts = vbr.convert_many(["BTC", "ETH", "DOGE", "USDT"], ["ETH", "USDT", "BTC", "DEAD"], [2, 0.5, 1, 1])
+    assert rates[:2].tolist() == [20.0, 3000.0]
+    assert amounts[:2].tolist() == [40.0, 1500.0]
+    assert all(math.isnan(value) for value in (*rates[2:], *amounts[2:]))
+
+
+def test_convert_many_matches_rate():
+    rng = np.random.default_rng(0)
+    prices = {f"C{index}": float(price) for index, price in enumerate(rng.uniform(0.001, 1e5, 50))}
+    matrix = RateMatrix(prices)
+    pairs = rng.choice(matrix.symbols, size=(200, 2))
+    rates, _ = matrix.convert_many(pairs[:, 0].tolist(), pairs[:, 1].tolist(), np.ones(200))
+    assert rates.tolist() == [matrix.rate(a, b) for a, b in pairs]
@@ -0,0 +1,101 @@
+import pytest
+from app.parsing import resilience
+from app.parsing.config import SCRAPER_MIN_TIMEOUT, SCRAPER_TIMEOUT_FACTOR
+from app.parsing.resilience import CircuitBreaker, LatencyTracker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def tracker_with(samples: list, window: int = 100, min_samples: int = 10) -> LatencyTracker:
+    tracker = LatencyTracker(window=window, min_samples=min_samples)
+    for seconds in samples:
+        tracker.record(seconds)
+    return tracker
+
+
+def test_no_percentiles_until_min_samples():
+    tracker = tracker_with([0.1] * 9)
+    assert tracker.percentile(99) is None
+    assert tracker.hedge_delay() is None
+    assert tracker.timeout(15.0) == 15.0
+
+
+def test_percentiles():
+    tracker = tracker_with([index / 100 for index in range(1, 101)])
+    assert tracker.percentile(50) == 0.51
+    assert tracker.hedge_delay() == 0.96
+    assert tracker.percentile(99) == 1.0
+
+
+def test_window_drops_old_samples():
+    tracker = tracker_with([10.0] * 100 + [0.5] * 100)
+    assert tracker.percentile(99) == 0.5
+
+
+@pytest.mark.parametrize("p99, ceiling, expected", [
+    (0.1, 15.0, SCRAPER_MIN_TIMEOUT),  # быстрый источник — не ниже минимума
+    (3.0, 15.0, 3.0 * SCRAPER_TIMEOUT_FACTOR),
+    (30.0, 15.0, 15.0),  # медленный — не выше таймаута источника
+])
+def test_timeout_clamped_to_p99_bounds(p99, ceiling, expected):
+    assert tracker_with([p99] * 20).timeout(ceiling) == pytest.approx(expected)
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Пока идёт пробный запрос, остальные не пропускаются
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now += 60
+    assert breaker.allow()
@@ -0,0 +1,46 @@
+import random
+import statistics
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, event, select
+from app.models.models import Base, PriceOhlc1h
+from app.parsing.rollups import RESOLUTIONS, aggregate, merge_statement
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def postgres_functions(connection, record):
+        # merge_statement пишет GREATEST/LEAST, как в PostgreSQL
+        connection.create_function("greatest", 2, max)
+        connection.create_function("least", 2, min)
+
+    Base.metadata.create_all(engine, tables=[PriceOhlc1h.__table__])
+    return engine
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_merged_candle_matches_pvariance(engine, seed):
+    rng = random.Random(seed)
+    # Цены масштаба BTC с малым разбросом — на них теряет точность формула через суммы квадратов
+    prices = [rng.gauss(100_000, 0.5) for _ in range(600)]
+    start = datetime(2024, 1, 1, 12)
+    ticks = [
+        {"currency": "BTC", "source": "vbr", "price": price, "timestamp": start + timedelta(seconds=index)}
+        for index, price in enumerate(prices)
+    ]
+    rng.shuffle(ticks)
+    cuts = sorted(rng.sample(range(1, len(ticks)), 9))
+    truncate = RESOLUTIONS["1h"][2]
+    with engine.begin() as connection:
+        for lower, upper in zip([0, *cuts], [*cuts, len(ticks)]):
+            connection.execute(merge_statement(PriceOhlc1h, aggregate(ticks[lower:upper], truncate)))
+        candle = connection.execute(select(PriceOhlc1h.__table__)).one()
+
+    assert candle.count == len(prices)
+    assert candle.mean == pytest.approx(statistics.fmean(prices), rel=1e-12)
+    assert candle.m2 / candle.count == pytest.approx(statistics.pvariance(prices), rel=1e-9)
+    assert candle.open == prices[0] and candle.close == prices[-1]
+    assert (candle.low, candle.high) == (min(prices), max(prices))
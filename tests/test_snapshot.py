@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from app.api.snapshot import SnapshotStore
+from app.service.price_snapshot import PriceSnapshot
+
+PRICES = {"BTC": {"vbr": 100.0, "bitinfo": 101.0}, "ETH": {"vbr": 10.0}}
+
+
+class FakeSession:
+    """
+    AsyncSessionLocal() с таблицей prices в памяти; считает запросы.
+    """
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.queries = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return list(self.rows)
+
+
+def message(version: int, prices: dict = PRICES, published_at: float = None) -> str:
+    return PriceSnapshot(version, time.time() if published_at is None else published_at, prices).to_message()
+
+
+def test_message_round_trip():
+    snapshot = PriceSnapshot.from_message(message(7))
+    assert snapshot.version == 7
+    assert snapshot.prices == PRICES
+    with pytest.raises(TypeError):
+        snapshot.prices["BTC"]["vbr"] = 0.0
+
+
+def test_older_versions_are_ignored():
+    store = SnapshotStore(max_age=60, session_factory=FakeSession([]))
+    assert store.apply(message(2))
+    assert not store.apply(message(1, {"BTC": {"vbr": 1.0}}))
+    assert not store.apply(message(2, {"BTC": {"vbr": 1.0}}))
+    assert store.current.prices["BTC"]["vbr"] == 100.0
+    assert store.apply(message(3, {"BTC": {"vbr": 1.0}}))
+    assert store.current.prices["BTC"]["vbr"] == 1.0
+    assert store.report()["version"] == 3
+    assert store.stats["ignored"] == 2
+
+
+def test_applied_snapshot_is_prepared():
+    store = SnapshotStore(max_age=60, session_factory=FakeSession([]))
+    store.apply(message(1))
+    assert store.current._rates is not None and store.current._index is not None
+
+
+def test_fresh_snapshot_is_served_without_db():
+    session = FakeSession([("BTC", "vbr", 1.0)])
+    store = SnapshotStore(max_age=60, session_factory=session)
+    store.apply(message(5))
+    snapshot = asyncio.run(store.get())
+    assert snapshot.version == 5
+    assert session.queries == 0
+    assert store.stats["hits"] == 1
+
+
+def test_stale_snapshot_is_reloaded_once():
+    session = FakeSession([("BTC", "vbr", 1.0), ("BTC", "bitinfo", 2.0)])
+    store = SnapshotStore(max_age=60, session_factory=session)
+    store.apply(message(5, published_at=time.time() - 120))
+
+    async def run():
+        return await asyncio.gather(*(store.get() for _ in range(10)))
+
+    snapshots = asyncio.run(run())
+    # Перечитывает один запрос, остальные получают его срез
+    assert session.queries == 1
+    assert {id(snapshot) for snapshot in snapshots} == {id(store.current)}
+    assert store.current.prices == {"BTC": {"vbr": 1.0, "bitinfo": 2.0}}
+    # Версия сохраняется: публикация воркера той же версии не затрёт перечитанный срез
+    assert store.current.version == 5
+    assert not store.apply(message(5))
+    assert store.apply(message(6))
+
+
+def test_empty_store_loads_from_db():
+    session = FakeSession([("ETH", "vbr", 10.0)])
+    store = SnapshotStore(max_age=60, session_factory=session)
+    snapshot = asyncio.run(store.get())
+    assert snapshot.version == 0
+    assert snapshot.prices == {"ETH": {"vbr": 10.0}}
+    assert store.stats["reloads"] == 1